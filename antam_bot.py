@@ -4,10 +4,13 @@ ANTAM Queue Registration Bot - Standalone Module
 Extracted for use with Flask dashboard
 """
 
+import os
+import sys
 import time
 import random
 import logging
 from datetime import datetime
+import dom_snapshot
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
@@ -15,10 +18,16 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
+# What fill_form keeps when an attempt ends: PNG screenshots, DOM snapshots or both
+ARTIFACT_MODES = ('screenshot', 'dom', 'both')
+
 class ANTAMQueueBot:
-    def __init__(self, headless=False):
+    def __init__(self, headless=False, artifacts='screenshot'):
         self.setup_driver(headless)
         self.success = False
+        self.last_result_summary = None
+        self.artifact_mode = artifacts if artifacts in ARTIFACT_MODES else 'screenshot'
+        self.artifacts = []  # saved since the controller last collected them
         self.user_data = {
             "name": "",
             "ktp": "", 
@@ -158,6 +167,7 @@ class ANTAMQueueBot:
             # Check for success indicators
             current_url = self.driver.current_url
             page_source = self.driver.page_source.lower()
+            self.last_result_summary = self.summarize_result_page()
             
             # Look for success indicators
             success_indicators = [
@@ -166,19 +176,36 @@ class ANTAMQueueBot:
             ]
             
             if any(indicator in page_source for indicator in success_indicators):
-                self.take_screenshot("SUCCESS")
+                self.save_artifacts("SUCCESS")
                 logging.info("🎉 FORM SUBMITTED SUCCESSFULLY! 🎉")
                 return True
             else:
-                self.take_screenshot("UNKNOWN_RESULT")
+                self.save_artifacts("UNKNOWN_RESULT")
                 logging.warning("Form submitted but unclear if successful")
                 return False
                 
         except Exception as e:
             logging.error(f"Error filling form: {str(e)}")
-            self.take_screenshot("ERROR")
+            self.save_artifacts("ERROR")
             return False
             
+    def summarize_result_page(self, limit=1000):
+        """Title, URL and visible text of the current page, for the run search index"""
+        try:
+            body_text = self.driver.find_element(By.TAG_NAME, "body").text
+            text = ' '.join(body_text.split())[:limit]
+            return f"{self.driver.title} | {self.driver.current_url} | {text}"
+        except Exception as e:
+            logging.warning(f"Could not summarize result page: {e}")
+            return None
+
+    def save_artifacts(self, prefix):
+        """Keep the debugging artifacts selected by artifact_mode"""
+        if self.artifact_mode in ('screenshot', 'both'):
+            self.take_screenshot(prefix)
+        if self.artifact_mode in ('dom', 'both'):
+            self.take_dom_snapshot(prefix)
+
     def take_screenshot(self, prefix):
         """Take screenshot for debugging"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -186,11 +213,34 @@ class ANTAMQueueBot:
         try:
             self.driver.save_screenshot(screenshot_path)
             logging.info(f"Screenshot saved: {screenshot_path}")
+            self.artifacts.append({'kind': 'screenshot', 'label': prefix, 'path': screenshot_path,
+                                   'content_hash': None, 'size_bytes': os.path.getsize(screenshot_path)})
             return screenshot_path
         except Exception as e:
             logging.error(f"Could not save screenshot: {e}")
             return None
+
+    def take_dom_snapshot(self, prefix):
+        """Save a compressed snapshot of the form markup, field values and visible messages"""
+        try:
+            state = self.driver.execute_script(dom_snapshot.CAPTURE_SCRIPT)
+            path, content_hash, size, created = dom_snapshot.store(state)
+            logging.info(f"DOM snapshot {'saved' if created else 'unchanged'}: {path} ({size} bytes)")
+            self.artifacts.append({'kind': 'dom', 'label': prefix, 'path': path,
+                                   'content_hash': content_hash, 'size_bytes': size})
+            return path
+        except Exception as e:
+            logging.error(f"Could not save DOM snapshot: {e}")
+            return None
             
+    @property
+    def driver_pid(self):
+        """PID of the chromedriver process backing this bot (Chrome runs under it)"""
+        try:
+            return self.driver.service.process.pid
+        except AttributeError:
+            return None
+
     def cleanup(self):
         """Clean up resources"""
         if hasattr(self, 'driver'):
@@ -253,8 +303,8 @@ if __name__ == "__main__":
     }
     
     try:
-        # Test site accessibility
-        test_url = "http://127.0.0.1:5500/contoh.html"
+        # Test site accessibility (defaults to the local stand-in: python stub_server.py)
+        test_url = sys.argv[1] if len(sys.argv) > 1 else "http://127.0.0.1:8000/"
         success, message = bot.test_site(test_url)
         print(f"Site test: {'PASS' if success else 'FAIL'} - {message}")
         
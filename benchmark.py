@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark
+Runs ANTAMQueueBot, the scheduler path and the dashboard against the local stub site
+(stub_server.py) and saves timings, peak RSS and DB write counts as JSON.
+Works offline; needs Chrome + chromedriver on PATH.
+
+Usage:
+    python benchmark.py --runs 3 --failure-rate 0.5
+    python benchmark.py --compare benchmarks/OLD.json benchmarks/NEW.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from datetime import datetime
+
+REPO_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTPUT_DIR = REPO_DIR / "benchmarks"
+DASHBOARD_ENDPOINTS = ['/', '/api/runs/recent', '/analytics']
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+# Summary keys compared by --compare (lower is better for all of them)
+COMPARE_KEYS = [
+    'time_to_start_s.p50', 'time_to_start_s.max',
+    'attempt_s.p50', 'attempt_s.p90',
+    'scheduler_check_s.max',
+    'peak_rss_bytes', 'peak_python_rss_bytes',
+    'db_writes_per_run', 'db_queries_per_run',
+    'dashboard_ms.p50', 'dashboard_ms.p90',
+]
+
+
+def percentiles(values):
+    """p50/p90/max/mean of a list (None when empty)"""
+    if not values:
+        return {'p50': None, 'p90': None, 'max': None, 'mean': None, 'count': 0}
+    ordered = sorted(values)
+
+    def pick(fraction):
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 4)
+
+    return {
+        'p50': pick(0.5),
+        'p90': pick(0.9),
+        'max': round(ordered[-1], 4),
+        'mean': round(sum(ordered) / len(ordered), 4),
+        'count': len(ordered),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+class DBCounter:
+    """Counts statements run on the bot path (run threads and scheduler ticks)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.writes = 0
+
+    def __call__(self, statement):
+        with self.lock:
+            self.queries += 1
+            if statement.lstrip().upper().startswith(WRITE_STATEMENTS):
+                self.writes += 1
+
+    def snapshot(self):
+        with self.lock:
+            return self.queries, self.writes
+
+
+class RSSSampler(threading.Thread):
+    """Tracks peak RSS of this process plus its children (chromedriver, Chrome)"""
+
+    def __init__(self, interval=0.2):
+        super().__init__(name='rss-sampler', daemon=True)
+        self.interval = interval
+        self.peak_total = 0
+        self.peak_python = 0
+        self.running = True
+
+    def run(self):
+        import process_reaper
+        pid = os.getpid()
+        while self.running:
+            processes = process_reaper.list_processes()
+            tree = process_reaper.process_tree(pid, processes)
+            self.peak_total = max(self.peak_total, sum(processes[p]['rss'] for p in tree))
+            if pid in processes:
+                self.peak_python = max(self.peak_python, processes[pid]['rss'])
+            time.sleep(self.interval)
+
+
+class DashboardProbe(threading.Thread):
+    """Hits dashboard pages while runs are in progress and records latency"""
+
+    def __init__(self, app, interval=0.5):
+        super().__init__(name='dashboard-probe', daemon=True)
+        self.client = app.test_client()
+        self.interval = interval
+        self.latencies = {endpoint: [] for endpoint in DASHBOARD_ENDPOINTS}
+        self.running = True
+
+    def run(self):
+        while self.running:
+            for endpoint in DASHBOARD_ENDPOINTS:
+                started = time.perf_counter()
+                self.client.get(endpoint)
+                self.latencies[endpoint].append((time.perf_counter() - started) * 1000)
+            time.sleep(self.interval)
+
+
+def instrument_bot(timings):
+    """Wrap ANTAMQueueBot to record driver start-up and per-attempt timings"""
+    from antam_bot import ANTAMQueueBot
+
+    original_setup = ANTAMQueueBot.setup_driver
+    original_fill = ANTAMQueueBot.fill_form
+
+    def setup_driver(self, headless=False):
+        started = time.perf_counter()
+        try:
+            return original_setup(self, headless)
+        finally:
+            timings['driver_start'].append(time.perf_counter() - started)
+
+    def fill_form(self, site_url):
+        started = time.perf_counter()
+        timings['attempt_starts'].append(time.time())
+        try:
+            return original_fill(self, site_url)
+        finally:
+            timings['attempts'].append(time.perf_counter() - started)
+
+    ANTAMQueueBot.setup_driver = setup_driver
+    ANTAMQueueBot.fill_form = fill_form
+
+
+def run_benchmark(args):
+    import stub_server
+
+    server, site_url = stub_server.start_in_thread(
+        failure_rate=args.failure_rate, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed
+    )
+
+    # The dashboard keeps its DB and screenshots relative to the working directory
+    workdir = Path(tempfile.mkdtemp(prefix='antam-bench-'))
+    os.chdir(workdir)
+    os.environ['ANTAM_BOT_HEADLESS'] = '0' if args.no_headless else '1'
+    # The benchmark drives the scheduler itself, and must not reap Chrome it doesn't own
+    os.environ['ANTAM_BOT_AUTOSTART'] = '0'
+
+    import bot_dashboard
+    controller = bot_dashboard.controller
+
+    counter = DBCounter()
+    original_connection = controller.get_db_connection
+    scheduler_tick = threading.local()
+
+    def counted_connection():
+        conn = original_connection()
+        # Only the bot path counts, not the dashboard probe or this harness's own bookkeeping
+        thread_name = threading.current_thread().name
+        if thread_name.startswith(bot_dashboard.run_search.RUN_THREAD_PREFIX) or getattr(scheduler_tick, 'active', False):
+            conn.set_trace_callback(counter)
+        return conn
+
+    controller.get_db_connection = counted_connection
+
+    timings = {'driver_start': [], 'attempts': [], 'attempt_starts': []}
+    instrument_bot(timings)
+
+    conn = controller.get_db_connection()
+    conn.execute('''
+        INSERT OR REPLACE INTO user_settings (id, name, ktp_last_6, phone_number)
+        VALUES (1, 'Bench User', '123456', '081234567890')
+    ''')
+    site_id = conn.execute("INSERT INTO sites (name, url) VALUES ('Stub', ?)", (site_url,)).lastrowid
+    conn.commit()
+    conn.close()
+
+    sampler = RSSSampler()
+    sampler.start()
+    probe = DashboardProbe(bot_dashboard.app)
+    probe.start()
+
+    runs = []
+    scheduler_checks = []
+    for index in range(args.runs):
+        queries_before, writes_before = counter.snapshot()
+        attempts_before = len(timings['attempts'])
+
+        run_id = None
+        while run_id is None:
+            # Schedule for the current WIB minute and let the real scheduler path start it
+            now = datetime.now(bot_dashboard.WIB)
+            conn = controller.get_db_connection()
+            schedule_id = conn.execute('''
+                INSERT INTO schedules (site_id, scheduled_time, duration_minutes, enabled)
+                VALUES (?, ?, ?, 1)
+            ''', (site_id, now.strftime("%H:%M"), args.duration_minutes)).lastrowid
+            conn.commit()
+            conn.close()
+
+            triggered_at = time.time()
+            started = time.perf_counter()
+            scheduler_tick.active = True
+            try:
+                controller.check_and_run_scheduled_bots()
+            finally:
+                scheduler_tick.active = False
+            scheduler_checks.append(time.perf_counter() - started)
+
+            conn = controller.get_db_connection()
+            row = conn.execute("SELECT id FROM bot_runs WHERE schedule_id = ?", (schedule_id,)).fetchone()
+            conn.close()
+            run_id = row['id'] if row else None  # None if the minute rolled over
+
+        deadline = time.time() + args.duration_minutes * 60 + 120
+        while run_id in controller.running_bots and time.time() < deadline:
+            time.sleep(0.1)
+        finished_at = time.time()
+
+        conn = controller.get_db_connection()
+        run = conn.execute("SELECT status, attempts, error_message FROM bot_runs WHERE id = ?", (run_id,)).fetchone()
+        conn.close()
+
+        queries_after, writes_after = counter.snapshot()
+        attempt_starts = [t for t in timings['attempt_starts'] if t >= triggered_at]
+        runs.append({
+            'run_id': run_id,
+            'status': run['status'],
+            'error_message': run['error_message'],
+            'attempts': run['attempts'],
+            'time_to_start_s': round(attempt_starts[0] - triggered_at, 4) if attempt_starts else None,
+            'attempt_s': [round(t, 4) for t in timings['attempts'][attempts_before:]],
+            'total_s': round(finished_at - triggered_at, 4),
+            'db_queries': queries_after - queries_before,
+            'db_writes': writes_after - writes_before,
+        })
+        logging.info(f"Run {index + 1}/{args.runs}: {run['status']} after {run['attempts']} attempts")
+
+    probe.running = False
+    sampler.running = False
+    probe.join()
+    sampler.join()
+    server.shutdown()
+    os.chdir(REPO_DIR)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    dashboard_all = [ms for values in probe.latencies.values() for ms in values]
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': vars(args),
+        },
+        'summary': {
+            'runs': len(runs),
+            'statuses': {status: sum(1 for r in runs if r['status'] == status) for status in {r['status'] for r in runs}},
+            'time_to_start_s': percentiles([r['time_to_start_s'] for r in runs if r['time_to_start_s'] is not None]),
+            'driver_start_s': percentiles(timings['driver_start']),
+            'attempt_s': percentiles(timings['attempts']),
+            'scheduler_check_s': percentiles(scheduler_checks),
+            'peak_rss_bytes': sampler.peak_total,
+            'peak_python_rss_bytes': sampler.peak_python,
+            'db_writes_per_run': round(sum(r['db_writes'] for r in runs) / len(runs), 2) if runs else None,
+            'db_queries_per_run': round(sum(r['db_queries'] for r in runs) / len(runs), 2) if runs else None,
+            'dashboard_ms': percentiles(dashboard_all),
+            'dashboard_ms_by_endpoint': {endpoint: percentiles(values) for endpoint, values in probe.latencies.items()},
+        },
+        'stub': dict(server.state.counters),
+        'runs': runs,
+    }
+
+
+def lookup(summary, dotted):
+    value = summary
+    for part in dotted.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def compare(old_path, new_path):
+    """Print summary metrics of two result files side by side"""
+    old = json.loads(Path(old_path).read_text())
+    new = json.loads(Path(new_path).read_text())
+    print(f"{'metric':<26} {old['meta']['commit']:>14} {new['meta']['commit']:>14} {'change':>9}")
+    for key in COMPARE_KEYS:
+        before, after = lookup(old['summary'], key), lookup(new['summary'], key)
+        if before in (None, 0) or after is None:
+            change = ''
+        else:
+            change = f"{(after - before) / before * 100:+.1f}%"
+        print(f"{key:<26} {str(before):>14} {str(after):>14} {change:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark against the local stub site")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--duration-minutes', type=int, default=1, help="schedule duration per run")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="stub: fraction of submissions rejected")
+    parser.add_argument('--latency-ms', type=float, default=0, help="stub: latency added to every response")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="stub: random extra latency")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--no-headless', action='store_true', help="show the browser (needs a display)")
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT_DIR), help="directory for the JSON result")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.path.insert(0, str(REPO_DIR))
+
+    output_dir = Path(args.output).resolve()
+    result = run_benchmark(args)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_path = output_dir / f"bench_{stamp}_{result['meta']['commit']}.json"
+    output_path.write_text(json.dumps(result, indent=2))
+    print(json.dumps(result['summary'], indent=2))
+    print(f"Saved {output_path}")
+
+
+if __name__ == '__main__':
+    main()
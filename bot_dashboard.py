@@ -4,9 +4,11 @@ ANTAM Bot Control Dashboard
 A Flask web app to schedule and monitor your queue registration bots
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session, send_file
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session, send_file, Response, stream_with_context
+from flask.logging import default_handler
 import sqlite3
 import json
+import csv
 from datetime import datetime, timedelta
 import threading
 import time
@@ -17,7 +19,14 @@ import subprocess
 import os
 from functools import wraps
 import base64
+import io
 import pytz
+import process_reaper
+import dom_snapshot
+import profiler
+import run_analytics
+import run_search
+import site_probe
 
 app = Flask(__name__, template_folder='templates')
 app.secret_key = "your-secret-key-change-this"
@@ -29,22 +38,84 @@ WIB = pytz.timezone('Asia/Jakarta')
 DB_PATH = "bot_control.db"
 LOGS_DIR = Path("logs")
 SCREENSHOTS_DIR = Path("screenshots")
+SNAPSHOTS_DIR = dom_snapshot.SNAPSHOTS_DIR
+
+# Chrome runs headed under Xvfb in production; set ANTAM_BOT_HEADLESS=1 elsewhere
+BOT_HEADLESS = os.environ.get('ANTAM_BOT_HEADLESS') == '1'
+
+# Failed-attempt artifacts: screenshot (PNG), dom (compressed DOM snapshot) or both
+BOT_ARTIFACTS = os.environ.get('ANTAM_BOT_ARTIFACTS', 'screenshot')
+
+# Watchdog settings
+WATCHDOG_INTERVAL = 30        # seconds between watchdog checks
+HUNG_RUN_GRACE_MINUTES = 5    # a run is hung this long after its deadline
+REAP_INTERVAL = 300           # seconds between orphaned Chrome sweeps
+
+# Site health probe results are reused for this long
+SITE_HEALTH_TTL = 300  # seconds
+
+# Run history export
+EXPORT_BATCH_SIZE = 500
+EXPORT_COLUMNS = [
+    'id', 'schedule_id', 'site_name', 'site_url', 'slot', 'start_time', 'end_time',
+    'status', 'attempts', 'duration_seconds', 'error_message', 'screenshot_file'
+]
 
 # Create directories
 LOGS_DIR.mkdir(exist_ok=True)
 SCREENSHOTS_DIR.mkdir(exist_ok=True)
+SNAPSHOTS_DIR.mkdir(exist_ok=True)
+
+class SystemClock:
+    """Wall-clock time for the scheduler path (scheduler_sim.py swaps in a virtual one)"""
+
+    def now(self):
+        return datetime.now(WIB)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def spawn(self, target, args=(), name=None):
+        """Start a daemon thread and return it"""
+        thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+        thread.start()
+        return thread
+
+def create_antam_bot():
+    """Default bot factory: a real Chrome-backed ANTAMQueueBot"""
+    from antam_bot import ANTAMQueueBot
+    return ANTAMQueueBot(headless=BOT_HEADLESS, artifacts=BOT_ARTIFACTS)
 
 class BotController:
-    def __init__(self):
+    def __init__(self, db_path=DB_PATH, clock=None, bot_factory=create_antam_bot, autostart=True):
+        self.db_path = db_path
+        self.clock = clock or SystemClock()
+        self.bot_factory = bot_factory
         self.init_db()
         self.scheduler_running = False
+        self.watchdog_running = False
         self.running_bots = {}  # Track running bot instances {run_id: bot_thread}
-        self.start_scheduler()
+        self.run_log_handler = run_search.install_run_log_capture(console_loggers=[
+            (logging.getLogger('werkzeug'), logging.StreamHandler()),
+            (app.logger, default_handler),
+        ])
+        self.reaper_stats = {
+            'last_reap': None,
+            'processes_killed': 0,
+            'bytes_freed': 0
+        }
+        if autostart:
+            self.reconcile_orphaned_runs()
+            self.start_scheduler()
+            self.start_watchdog()
         
     def init_db(self):
         """Initialize SQLite database"""
-        conn = sqlite3.connect(DB_PATH)
+        conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
+
+        # WAL lets long readers (exports) run while bot threads keep writing
+        cursor.execute("PRAGMA journal_mode=WAL")
         
         # Sites table
         cursor.execute('''
@@ -79,14 +150,51 @@ class BotController:
                 site_url TEXT,
                 start_time TIMESTAMP,
                 end_time TIMESTAMP,
-                status TEXT, -- pending, running, success, failed, timeout, cancelled
+                status TEXT, -- pending, running, success, failed, timeout, cancelled, interrupted
                 attempts INTEGER DEFAULT 0,
                 log_file TEXT,
                 screenshot_file TEXT,
                 error_message TEXT,
+                driver_pid INTEGER,
+                slot TEXT, -- scheduled_time (HH:MM WIB) of the schedule that started the run
+                started_at REAL, -- unix timestamp
+                duration_seconds REAL, -- set once when the run finishes
                 FOREIGN KEY (schedule_id) REFERENCES schedules (id)
             )
         ''')
+        self.ensure_column(cursor, 'bot_runs', 'driver_pid', 'INTEGER')
+        self.ensure_column(cursor, 'bot_runs', 'slot', 'TEXT')
+        self.ensure_column(cursor, 'bot_runs', 'started_at', 'REAL')
+        self.ensure_column(cursor, 'bot_runs', 'duration_seconds', 'REAL')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_bot_runs_start_time ON bot_runs (start_time)")
+
+        # Run analytics, updated incrementally as runs finish
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS run_stats (
+                site_name TEXT NOT NULL,
+                slot TEXT NOT NULL,
+                runs INTEGER DEFAULT 0,
+                success INTEGER DEFAULT 0,
+                timeout INTEGER DEFAULT 0,
+                failed INTEGER DEFAULT 0,
+                cancelled INTEGER DEFAULT 0,
+                interrupted INTEGER DEFAULT 0,
+                total_duration REAL DEFAULT 0,
+                max_duration REAL DEFAULT 0,
+                max_attempts INTEGER DEFAULT 0,
+                PRIMARY KEY (site_name, slot)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS run_histogram (
+                site_name TEXT NOT NULL,
+                slot TEXT NOT NULL,
+                metric TEXT NOT NULL, -- duration, attempts
+                bucket INTEGER NOT NULL,
+                count INTEGER DEFAULT 0,
+                PRIMARY KEY (site_name, slot, metric, bucket)
+            )
+        ''')
         
         # User settings table
         cursor.execute('''
@@ -99,6 +207,61 @@ class BotController:
             )
         ''')
         
+        # Site health table (latest HTTP probe result per site)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS site_health (
+                site_id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                ok BOOLEAN NOT NULL,
+                status_code INTEGER,
+                response_time_ms REAL,
+                message TEXT,
+                checked_at REAL NOT NULL, -- unix timestamp
+                FOREIGN KEY (site_id) REFERENCES sites (id)
+            )
+        ''')
+        
+        # Screenshots and DOM snapshots saved by each run (snapshots are shared by content hash)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS run_artifacts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id INTEGER NOT NULL,
+                kind TEXT NOT NULL, -- screenshot, dom
+                label TEXT, -- SUCCESS, UNKNOWN_RESULT, ERROR
+                path TEXT NOT NULL,
+                content_hash TEXT,
+                size_bytes INTEGER,
+                created_at TIMESTAMP,
+                FOREIGN KEY (run_id) REFERENCES bot_runs (id)
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_run_artifacts_run ON run_artifacts (run_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_run_artifacts_hash ON run_artifacts (content_hash)")
+        
+        # Full-text index over run errors, log lines and result pages
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS run_text USING fts5 (
+                    content,
+                    kind UNINDEXED, -- error, log, result
+                    run_id UNINDEXED,
+                    site_name UNINDEXED,
+                    created_at UNINDEXED
+                )
+            ''')
+            self.fts_enabled = True
+            # Index errors recorded before the index existed (first start only)
+            cursor.execute("SELECT COUNT(*) FROM run_text")
+            if cursor.fetchone()[0] == 0:
+                cursor.execute('''
+                    INSERT INTO run_text (content, kind, run_id, site_name, created_at)
+                    SELECT error_message, 'error', id, site_name, substr(COALESCE(end_time, start_time), 1, 19)
+                    FROM bot_runs WHERE error_message IS NOT NULL
+                ''')
+        except sqlite3.OperationalError as e:
+            logging.warning(f"SQLite FTS5 not available, run search disabled: {e}")
+            self.fts_enabled = False
+
         # Insert default data if empty
         cursor.execute("SELECT COUNT(*) FROM sites")
         if cursor.fetchone()[0] == 0:
@@ -112,17 +275,69 @@ class BotController:
         conn.commit()
         conn.close()
         
+    def ensure_column(self, cursor, table, column, definition):
+        """Add a column to an existing table (CREATE TABLE IF NOT EXISTS won't)"""
+        columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
     def get_db_connection(self):
-        conn = sqlite3.connect(DB_PATH)
+        conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         return conn
         
+    def reconcile_orphaned_runs(self):
+        """Mark runs left 'running' by a previous process as interrupted.
+
+        Nothing is running in this controller yet, so a 'running' row belongs
+        either to a process that died (service restart, crash) or to another
+        live process importing this module (e.g. the Werkzeug reloader's
+        parent). Runs whose chromedriver is still attached to a live Python
+        process are left alone; the rest are interrupted and their Chrome
+        trees killed.
+        """
+        try:
+            conn = self.get_db_connection()
+            running_rows = conn.execute(
+                "SELECT id, driver_pid FROM bot_runs WHERE status = 'running'"
+            ).fetchall()
+
+            processes = process_reaper.list_processes()
+            live_pids = [
+                run['driver_pid'] for run in running_rows
+                if process_reaper.is_attached_driver(run['driver_pid'], processes)
+            ]
+            stale_runs = [run for run in running_rows if run['driver_pid'] not in live_pids]
+
+            now = self.clock.now()
+            for run in stale_runs:
+                process_reaper.kill_process_tree(run['driver_pid'])
+                conn.execute('''
+                    UPDATE bot_runs
+                    SET status = 'interrupted', end_time = ?,
+                        error_message = COALESCE(error_message, 'Service restarted while run was in progress')
+                    WHERE id = ? AND status = 'running'
+                ''', (now, run['id']))
+                self.record_run_analytics(conn, run['id'], now)
+            conn.commit()
+            conn.close()
+
+            if stale_runs:
+                logging.info(f"Marked {len(stale_runs)} orphaned runs as interrupted")
+
+            if live_pids:
+                logging.info(f"Left {len(live_pids)} runs of another live process running")
+
+            # Only other live processes own runs yet, so any other WebDriver Chrome is left over
+            self.record_reap(*process_reaper.reap_orphans(live_pids, min_age=0))
+        except Exception as e:
+            logging.error(f"Error reconciling orphaned runs: {e}")
+
     def start_scheduler(self):
         """Start background scheduler thread"""
         if not self.scheduler_running:
             self.scheduler_running = True
-            scheduler_thread = threading.Thread(target=self.scheduler_loop, daemon=True)
-            scheduler_thread.start()
+            self.clock.spawn(self.scheduler_loop, name='scheduler')
             
     def scheduler_loop(self):
         """Main scheduler loop - adaptive checking"""
@@ -145,13 +360,137 @@ class BotController:
                 logging.error(f"Scheduler error: {e}")
                 sleep_time = 60
                 
-            time.sleep(sleep_time)
+            self.clock.sleep(sleep_time)
             
+    def start_watchdog(self):
+        """Start background watchdog thread for hung runs and stray Chrome"""
+        if not self.watchdog_running:
+            self.watchdog_running = True
+            self.clock.spawn(self.watchdog_loop, name='watchdog')
+
+    def watchdog_loop(self):
+        """Kill hung runs and periodically reap Chrome processes no run owns"""
+        last_reap = self.clock.now()
+        while self.watchdog_running:
+            try:
+                self.kill_hung_runs()
+
+                if (self.clock.now() - last_reap).total_seconds() >= REAP_INTERVAL:
+                    last_reap = self.clock.now()
+                    self.record_reap(*process_reaper.reap_orphans(self.owned_driver_pids()))
+            except Exception as e:
+                logging.error(f"Watchdog error: {e}")
+
+            self.clock.sleep(WATCHDOG_INTERVAL)
+
+    def owned_driver_pids(self):
+        """chromedriver PIDs of every run in progress.
+
+        running_bots only knows this process's runs. Any second process that
+        imports this module (the Werkzeug reloader's parent and child, or a
+        custom gunicorn --preload deployment) runs its own controller, so the
+        PIDs persisted on 'running' rows count as owned as well.
+        """
+        owned = {info.get('driver_pid') for info in list(self.running_bots.values())}
+        conn = self.get_db_connection()
+        owned.update(
+            row['driver_pid'] for row in conn.execute(
+                "SELECT driver_pid FROM bot_runs WHERE status = 'running' AND driver_pid IS NOT NULL"
+            )
+        )
+        conn.close()
+        owned.discard(None)
+        return owned
+
+    def kill_hung_runs(self):
+        """Kill the Chrome tree of runs that are well past their deadline"""
+        now = self.clock.now()
+        for run_id, info in list(self.running_bots.items()):
+            deadline = info.get('deadline')
+            if info.get('hung') or not deadline:
+                continue
+            if now < deadline + timedelta(minutes=HUNG_RUN_GRACE_MINUTES):
+                continue
+
+            info['hung'] = True
+            info['cancelled'] = True
+            logging.warning(f"Bot run {run_id} is past its deadline, killing its browser")
+
+            self.record_reap(*process_reaper.kill_process_tree(info.get('driver_pid')))
+            self.update_bot_run(
+                run_id,
+                'interrupted',
+                end_time=now,
+                error_message='Watchdog killed hung run after deadline'
+            )
+
+    def record_reap(self, killed, freed):
+        """Accumulate reaper statistics"""
+        self.reaper_stats['last_reap'] = self.clock.now().isoformat()
+        self.reaper_stats['processes_killed'] += killed
+        self.reaper_stats['bytes_freed'] += freed
+
+    def probe_sites(self, site_ids=None, force=False):
+        """Probe sites over HTTP, reusing results younger than SITE_HEALTH_TTL.
+
+        Returns {site_id: health dict}.
+        """
+        conn = self.get_db_connection()
+        query = '''
+            SELECT st.id, st.url, h.url AS checked_url, h.ok, h.status_code,
+                   h.response_time_ms, h.message, h.checked_at
+            FROM sites st
+            LEFT JOIN site_health h ON h.site_id = st.id
+        '''
+        params = []
+        if site_ids is not None:
+            query += f" WHERE st.id IN ({', '.join('?' for _ in site_ids)})"
+            params = list(site_ids)
+        rows = conn.execute(query, params).fetchall()
+
+        now = time.time()
+        health = {}
+        stale = []
+        for row in rows:
+            fresh = (row['checked_at'] is not None
+                     and row['checked_url'] == row['url']
+                     and now - row['checked_at'] < SITE_HEALTH_TTL)
+            if fresh and not force:
+                health[row['id']] = self.format_site_health(row)
+            else:
+                stale.append(row)
+
+        results = site_probe.probe_sites([row['url'] for row in stale])
+        checked_at = time.time()
+        for row in stale:
+            result = results[row['url']]
+            conn.execute('''
+                INSERT OR REPLACE INTO site_health
+                (site_id, url, ok, status_code, response_time_ms, message, checked_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (row['id'], row['url'], result['ok'], result['status_code'],
+                  result['response_time_ms'], result['message'], checked_at))
+            health[row['id']] = self.format_site_health(dict(result, checked_at=checked_at))
+
+        conn.commit()
+        conn.close()
+        return health
+
+    def format_site_health(self, row):
+        """Normalise a site_health row / probe result for templates and JSON"""
+        return {
+            'ok': bool(row['ok']),
+            'status_code': row['status_code'],
+            'response_time_ms': row['response_time_ms'],
+            'message': row['message'],
+            'checked_at': datetime.fromtimestamp(row['checked_at'], WIB).strftime('%Y-%m-%d %H:%M:%S WIB')
+        }
+
     def check_and_run_scheduled_bots(self):
         """Check for bots that should run now"""
         conn = self.get_db_connection()
         # Use WIB timezone for scheduling
-        now = datetime.now(WIB)
+        now = self.clock.now()
         current_time = now.strftime("%H:%M")
         
         # Find schedules that should run now
@@ -178,45 +517,52 @@ class BotController:
                 
         conn.close()
         
-    def start_bot_run(self, schedule):
-        """Start a bot run for a schedule"""
+    def start_bot_run(self, schedule, manual=False):
+        """Start a bot run for a schedule (manual runs are kept out of its time slot)"""
         conn = self.get_db_connection()
         
         # Create bot run record
+        now = self.clock.now()
+        slot = run_analytics.MANUAL_SLOT if manual else schedule['scheduled_time']
         run_id = conn.execute('''
-            INSERT INTO bot_runs (schedule_id, site_name, site_url, start_time, status)
-            VALUES (?, ?, ?, ?, 'running')
-        ''', (schedule['id'], schedule['site_name'], schedule['site_url'], datetime.now(WIB))).lastrowid
+            INSERT INTO bot_runs (schedule_id, site_name, site_url, start_time, status, slot, started_at)
+            VALUES (?, ?, ?, ?, 'running', ?, ?)
+        ''', (schedule['id'], schedule['site_name'], schedule['site_url'], now,
+              slot, now.timestamp())).lastrowid
         
         conn.commit()
         conn.close()
         
+        # Track the running bot (before start, so the thread always finds its entry)
+        tracking = {
+            'thread': None,
+            'bot_instance': None,  # Will be set in run_bot_instance
+            'driver_pid': None,
+            'deadline': None,
+            'cancelled': False,
+            'hung': False
+        }
+        self.running_bots[run_id] = tracking
+
         # Start bot in separate thread
-        bot_thread = threading.Thread(
-            target=self.run_bot_instance,
+        tracking['thread'] = self.clock.spawn(
+            self.run_bot_instance,
             args=(run_id, schedule),
-            daemon=True
+            name=f'bot-run-{run_id}'
         )
-        bot_thread.start()
-
-        # Track the running bot
-        self.running_bots[run_id] = {
-            'thread': bot_thread,
-            'bot_instance': None,  # Will be set in run_bot_instance
-            'cancelled': False
-        }
         
     def run_bot_instance(self, run_id, schedule):
         """Run the actual bot instance"""
         try:
-            from antam_bot import ANTAMQueueBot
-            
             # Get user settings
             conn = self.get_db_connection()
             user_settings = conn.execute("SELECT * FROM user_settings WHERE id = 1").fetchone()
+            conn.close()
             
             if not user_settings:
-                self.update_bot_run(run_id, 'failed', error_message='No user settings configured')
+                self.update_bot_run(run_id, 'failed', end_time=self.clock.now(),
+                                    error_message='No user settings configured')
+                self.running_bots.pop(run_id, None)
                 return
                 
             # Configure bot
@@ -225,50 +571,62 @@ class BotController:
                 'url': schedule['site_url']
             }
             
-            bot = ANTAMQueueBot()
+            bot = self.bot_factory()
             bot.user_data = {
                 'name': user_settings['name'],
                 'ktp': user_settings['ktp_last_6'],
                 'phone': user_settings['phone_number']
             }
 
-            # Store bot instance for potential cancellation
-            if run_id in self.running_bots:
-                self.running_bots[run_id]['bot_instance'] = bot
-            
             # Run bot
-            start_time = datetime.now(WIB)
+            start_time = self.clock.now()
             success = False
             attempt_count = 0
 
             end_time = start_time + timedelta(minutes=schedule['duration_minutes'])
+
+            # Store bot instance for potential cancellation and the watchdog
+            driver_pid = bot.driver_pid
+            if run_id in self.running_bots:
+                self.running_bots[run_id].update({
+                    'bot_instance': bot,
+                    'driver_pid': driver_pid,
+                    'deadline': end_time
+                })
+            self.record_driver_pid(run_id, driver_pid)
             
-            while datetime.now(WIB) < end_time and not success:
+            while self.clock.now() < end_time and not success:
                 # Check if cancelled
                 if run_id in self.running_bots and self.running_bots[run_id]['cancelled']:
-                    self.update_bot_run(run_id, 'cancelled', end_time=datetime.now(WIB), attempts=attempt_count)
+                    if not self.running_bots[run_id]['hung']:
+                        self.update_bot_run(run_id, 'cancelled', end_time=self.clock.now(), attempts=attempt_count)
                     bot.cleanup()
                     self.disable_schedule_after_run(schedule['id'])
-                    self.running_bots.pop(run_id, None)
+                    self.release_run(run_id)
                     return
 
                 attempt_count += 1
                 self.update_bot_run(run_id, 'running', attempts=attempt_count)
 
-                if bot.fill_form(schedule['site_url']):
+                attempt_success = bot.fill_form(schedule['site_url'])
+
+                self.collect_attempt_outputs(run_id, bot)
+
+                if attempt_success:
                     success = True
                     break
 
-                time.sleep(random.uniform(3, 8))
+                self.clock.sleep(random.uniform(3, 8))
                 
-            # Update final status
-            final_status = 'success' if success else 'timeout'
-            self.update_bot_run(
-                run_id,
-                final_status,
-                end_time=datetime.now(WIB),
-                attempts=attempt_count
-            )
+            # Update final status (a run killed by the watchdog already has one)
+            if not self.running_bots.get(run_id, {}).get('hung'):
+                final_status = 'success' if success else 'timeout'
+                self.update_bot_run(
+                    run_id,
+                    final_status,
+                    end_time=self.clock.now(),
+                    attempts=attempt_count
+                )
 
             # Auto-disable schedule after first run (one-time behavior)
             self.disable_schedule_after_run(schedule['id'])
@@ -276,17 +634,77 @@ class BotController:
             bot.cleanup()
 
             # Remove from running bots tracking
-            self.running_bots.pop(run_id, None)
+            self.release_run(run_id)
             
         except Exception as e:
-            self.update_bot_run(run_id, 'failed', error_message=str(e))
+            # A run killed by the watchdog already has its final status
+            if not self.running_bots.get(run_id, {}).get('hung'):
+                self.update_bot_run(run_id, 'failed', end_time=self.clock.now(), error_message=str(e))
             # Auto-disable schedule even if failed (one-time behavior)
             self.disable_schedule_after_run(schedule['id'])
             # Remove from running bots tracking
-            self.running_bots.pop(run_id, None)
+            self.release_run(run_id)
+
+    def collect_attempt_outputs(self, run_id, bot):
+        """Store the result page summary and artifacts the bot left from its last attempt"""
+        result_summary = getattr(bot, 'last_result_summary', None)
+        artifacts = getattr(bot, 'artifacts', None)
+        if not result_summary and not artifacts:
+            return
+        bot.last_result_summary = None
+        bot.artifacts = []
+
+        conn = self.get_db_connection()
+        if result_summary:
+            self.index_run_text(conn, run_id, [('result', result_summary, self.clock.now())])
+        if artifacts:
+            self.record_run_artifacts(conn, run_id, artifacts)
+        conn.commit()
+        conn.close()
+
+    def record_run_artifacts(self, conn, run_id, artifacts):
+        """Link saved screenshots/snapshots to a run (caller commits)"""
+        now = self.clock.now()
+        conn.executemany('''
+            INSERT INTO run_artifacts (run_id, kind, label, path, content_hash, size_bytes, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (run_id, artifact['kind'], artifact['label'], artifact['path'],
+             artifact['content_hash'], artifact['size_bytes'], now)
+            for artifact in artifacts
+        ])
+        screenshots = [artifact['path'] for artifact in artifacts if artifact['kind'] == 'screenshot']
+        if screenshots:
+            conn.execute("UPDATE bot_runs SET screenshot_file = ? WHERE id = ?", (screenshots[-1], run_id))
+
+    def record_driver_pid(self, run_id, driver_pid):
+        """Persist the chromedriver PID so a restarted service can kill it"""
+        conn = self.get_db_connection()
+        conn.execute("UPDATE bot_runs SET driver_pid = ? WHERE id = ?", (driver_pid, run_id))
+        conn.commit()
+        conn.close()
+
+    def release_run(self, run_id):
+        """Stop tracking a run and make sure its Chrome tree is gone"""
+        info = self.running_bots.pop(run_id, None)
+        if info and info.get('driver_pid'):
+            self.record_reap(*process_reaper.kill_process_tree(info['driver_pid']))
+
+        # Index whatever the run logged after its last status update
+        entries = self.drain_run_logs(run_id)
+        if entries:
+            conn = self.get_db_connection()
+            self.index_run_text(conn, run_id, entries)
+            conn.commit()
+            conn.close()
             
     def update_bot_run(self, run_id, status, end_time=None, attempts=None, error_message=None):
-        """Update bot run status"""
+        """Update bot run status.
+
+        A run that already has a final status (success, timeout, failed,
+        cancelled, interrupted) is left alone, so a late update from the run
+        thread can't overwrite what the watchdog or a cancel recorded.
+        """
         conn = self.get_db_connection()
         
         updates = ['status = ?']
@@ -305,12 +723,65 @@ class BotController:
             params.append(error_message)
             
         params.append(run_id)
+        final_statuses = sorted(run_analytics.FINAL_STATUSES)
+        params.extend(final_statuses)
         
-        query = f"UPDATE bot_runs SET {', '.join(updates)} WHERE id = ?"
-        conn.execute(query, params)
+        query = f"""
+            UPDATE bot_runs SET {', '.join(updates)}
+            WHERE id = ? AND status NOT IN ({', '.join('?' * len(final_statuses))})
+        """
+        updated = conn.execute(query, params).rowcount
+        if not updated:
+            logging.info(f"Bot run {run_id} already finished, not changing it to {status}")
+
+        entries = []
+        if error_message and updated:
+            entries.append(('error', error_message, self.clock.now()))
+        entries.extend(self.drain_run_logs(run_id))
+        self.index_run_text(conn, run_id, entries)
+
+        if updated and status in run_analytics.FINAL_STATUSES:
+            self.record_run_analytics(conn, run_id, end_time or self.clock.now())
+
         conn.commit()
         conn.close()
 
+    def drain_run_logs(self, run_id):
+        """Buffered log lines of a run as search index entries"""
+        return [
+            ('log', line, datetime.fromtimestamp(created, WIB))
+            for created, line in self.run_log_handler.drain(run_id)
+        ]
+
+    def index_run_text(self, conn, run_id, entries):
+        """Add entries [(kind, text, datetime)] to the run search index (caller commits)"""
+        if not self.fts_enabled or not entries:
+            return
+        run = conn.execute("SELECT site_name FROM bot_runs WHERE id = ?", (run_id,)).fetchone()
+        run_search.insert_entries(conn, run_id, run['site_name'] if run else None, entries)
+
+    def record_run_analytics(self, conn, run_id, end_time):
+        """Store the run's duration and fold it into the analytics tables.
+
+        The duration_seconds guard makes this idempotent, so a run that gets
+        several final updates (e.g. watchdog then thread) is counted once.
+        """
+        updated = conn.execute('''
+            UPDATE bot_runs SET duration_seconds = MAX(0, ? - started_at)
+            WHERE id = ? AND duration_seconds IS NULL AND started_at IS NOT NULL
+        ''', (end_time.timestamp(), run_id)).rowcount
+        if not updated:
+            return
+
+        run = conn.execute(
+            "SELECT site_name, slot, status, attempts, duration_seconds FROM bot_runs WHERE id = ?",
+            (run_id,)
+        ).fetchone()
+        run_analytics.record_run(
+            conn, run['site_name'], run['slot'], run['status'],
+            run['duration_seconds'], run['attempts'] or 0
+        )
+
     def disable_schedule_after_run(self, schedule_id):
         """Disable schedule after it runs once (one-time behavior)"""
         try:
@@ -352,12 +823,15 @@ class BotController:
 
             # Update all hanging runs in database
             conn = self.get_db_connection()
-            conn.execute('''
-                UPDATE bot_runs
-                SET status = 'cancelled', end_time = CURRENT_TIMESTAMP
-                WHERE status = 'running'
-            ''')
-            db_updated = conn.total_changes
+            now = self.clock.now()
+            hanging_runs = conn.execute("SELECT id FROM bot_runs WHERE status = 'running'").fetchall()
+            db_updated = 0
+            for run in hanging_runs:
+                db_updated += conn.execute(
+                    "UPDATE bot_runs SET status = 'cancelled', end_time = ? WHERE id = ? AND status = 'running'",
+                    (now, run['id'])
+                ).rowcount
+                self.record_run_analytics(conn, run['id'], now)
             conn.commit()
             conn.close()
 
@@ -382,8 +856,9 @@ def require_auth(f):
         return f(*args, **kwargs)
     return decorated_function
 
-# Initialize controller
-controller = BotController()
+# Initialize controller (ANTAM_BOT_AUTOSTART=0 skips reconciliation and background threads,
+# for tools that import this module and drive their own controller)
+controller = BotController(autostart=os.environ.get('ANTAM_BOT_AUTOSTART', '1') == '1')
 
 @app.route('/')
 def dashboard():
@@ -481,6 +956,96 @@ def delete_schedule(schedule_id):
 
     return redirect(url_for('schedules'))
 
+@app.route('/sites')
+def sites():
+    """View sites with their latest cached health"""
+    conn = controller.get_db_connection()
+    sites = conn.execute('''
+        SELECT st.*, h.ok AS health_ok, h.status_code AS health_status,
+               h.response_time_ms AS health_ms, h.message AS health_message,
+               h.checked_at AS health_checked_at, h.url AS health_url
+        FROM sites st
+        LEFT JOIN site_health h ON h.site_id = st.id
+        ORDER BY st.name
+    ''').fetchall()
+    conn.close()
+    return render_template('sites.html', sites=sites)
+
+@app.route('/sites/add', methods=['POST'])
+def add_site():
+    """Add a new site"""
+    try:
+        conn = controller.get_db_connection()
+        conn.execute("INSERT INTO sites (name, url) VALUES (?, ?)", (request.form['name'], request.form['url']))
+        conn.commit()
+        conn.close()
+        flash('Site added successfully!', 'success')
+    except Exception as e:
+        flash(f'Error adding site: {str(e)}', 'error')
+
+    return redirect(url_for('sites'))
+
+@app.route('/sites/edit/<int:site_id>', methods=['POST'])
+def edit_site(site_id):
+    """Update a site's name and URL"""
+    try:
+        conn = controller.get_db_connection()
+        conn.execute("UPDATE sites SET name = ?, url = ? WHERE id = ?",
+                     (request.form['name'], request.form['url'], site_id))
+        conn.commit()
+        conn.close()
+        flash('Site updated successfully!', 'success')
+    except Exception as e:
+        flash(f'Error updating site: {str(e)}', 'error')
+
+    return redirect(url_for('sites'))
+
+@app.route('/sites/toggle/<int:site_id>', methods=['POST'])
+def toggle_site(site_id):
+    """Toggle site enabled/disabled status"""
+    try:
+        conn = controller.get_db_connection()
+        conn.execute("UPDATE sites SET enabled = NOT enabled WHERE id = ?", (site_id,))
+        conn.commit()
+        conn.close()
+        flash('Site status updated!', 'success')
+    except Exception as e:
+        flash(f'Error toggling site status: {str(e)}', 'error')
+
+    return redirect(url_for('sites'))
+
+@app.route('/sites/delete/<int:site_id>', methods=['POST'])
+def delete_site(site_id):
+    """Delete a site with its schedules and health record"""
+    try:
+        conn = controller.get_db_connection()
+        conn.execute("DELETE FROM schedules WHERE site_id = ?", (site_id,))
+        conn.execute("DELETE FROM site_health WHERE site_id = ?", (site_id,))
+        conn.execute("DELETE FROM sites WHERE id = ?", (site_id,))
+        conn.commit()
+        conn.close()
+        flash('Site deleted successfully!', 'success')
+    except Exception as e:
+        flash(f'Error deleting site: {str(e)}', 'error')
+
+    return redirect(url_for('sites'))
+
+@app.route('/api/sites/probe', methods=['POST'])
+def api_probe_sites():
+    """Probe all sites over HTTP (cached for SITE_HEALTH_TTL unless ?force=1)"""
+    force = request.args.get('force', 0, type=int) == 1
+    health = controller.probe_sites(force=force)
+    return jsonify({str(site_id): result for site_id, result in health.items()})
+
+@app.route('/api/sites/<int:site_id>/probe', methods=['POST'])
+def api_probe_site(site_id):
+    """Probe a single site over HTTP"""
+    force = request.args.get('force', 0, type=int) == 1
+    health = controller.probe_sites([site_id], force=force)
+    if site_id not in health:
+        return jsonify({'error': 'Site not found'}), 404
+    return jsonify(health[site_id])
+
 @app.route('/add-task')
 def add_task():
     """Show combined site and schedule creation form"""
@@ -557,6 +1122,147 @@ def api_recent_runs():
     
     return jsonify([dict(run) for run in runs])
 
+def parse_export_bound(value, end_of_day=False):
+    """Parse a from/to filter ('YYYY-MM-DD' or 'YYYY-MM-DDTHH:MM[:SS]') into a WIB start_time string"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if end_of_day and len(value) == 10:
+        # A bare 'to' date includes the whole day
+        parsed += timedelta(days=1)
+    if parsed.tzinfo is None:
+        parsed = WIB.localize(parsed)
+    # start_time is stored as str(datetime in WIB), which sorts correctly as text
+    return str(parsed.astimezone(WIB))
+
+def export_rows(query, params, fmt):
+    """Yield the export in chunks, reading EXPORT_BATCH_SIZE rows at a time"""
+    conn = controller.get_db_connection()
+    try:
+        cursor = conn.execute(query, params)
+        columns = [column[0] for column in cursor.description]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        if fmt == 'csv':
+            writer.writerow(columns)
+
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            if fmt == 'csv':
+                writer.writerows(tuple(row) for row in rows)
+            else:
+                for row in rows:
+                    buffer.write(json.dumps(dict(zip(columns, row)), default=str))
+                    buffer.write('\n')
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        if fmt == 'csv' and buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        conn.close()
+
+@app.route('/api/runs/export')
+def api_export_runs():
+    """Stream run history as CSV or NDJSON (?format=csv|ndjson&from=&to=&site=)"""
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+
+    try:
+        start = parse_export_bound(request.args.get('from'))
+        end = parse_export_bound(request.args.get('to'), end_of_day=True)
+    except ValueError:
+        return jsonify({'error': 'from/to must be YYYY-MM-DD or ISO datetimes'}), 400
+
+    conditions = []
+    params = []
+    if start:
+        conditions.append('start_time >= ?')
+        params.append(start)
+    if end:
+        conditions.append('start_time < ?')
+        params.append(end)
+    if request.args.get('site'):
+        conditions.append('site_name = ?')
+        params.append(request.args['site'])
+
+    query = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM bot_runs"
+    if conditions:
+        query += f" WHERE {' AND '.join(conditions)}"
+    query += " ORDER BY start_time, id"
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    filename = f"bot_runs_{datetime.now(WIB).strftime('%Y%m%d_%H%M%S')}.{fmt}"
+    return Response(
+        stream_with_context(export_rows(query, params, fmt)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+@app.route('/search')
+def search():
+    """Search run errors, logs and result pages"""
+    query = request.args.get('q', '').strip()
+    kind = request.args.get('kind', '')
+    results = []
+    if query and controller.fts_enabled:
+        conn = controller.get_db_connection()
+        results = run_search.search(conn, query, kind=kind, site_name=request.args.get('site'))
+        conn.close()
+    return render_template('search.html', query=query, kind=kind, results=results,
+                           kinds=run_search.KINDS, fts_enabled=controller.fts_enabled)
+
+@app.route('/api/search')
+def api_search():
+    """API endpoint for ranked run text search (?q=&kind=error|log|result&site=&limit=)"""
+    if not controller.fts_enabled:
+        return jsonify({'error': 'Search index not available (SQLite without FTS5)'}), 503
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+
+    conn = controller.get_db_connection()
+    results = run_search.search(
+        conn, query,
+        kind=request.args.get('kind'),
+        site_name=request.args.get('site'),
+        limit=request.args.get('limit', 50, type=int)
+    )
+    conn.close()
+    return jsonify(results)
+
+@app.route('/api/watchdog')
+def api_watchdog():
+    """API endpoint for watchdog / reaper status"""
+    return jsonify({
+        'running_runs': [
+            {'run_id': run_id, 'driver_pid': info.get('driver_pid'), 'hung': info.get('hung', False)}
+            for run_id, info in list(controller.running_bots.items())
+        ],
+        'reaper': dict(controller.reaper_stats)
+    })
+
+@app.route('/analytics')
+def analytics():
+    """Per-site, per-slot run analytics"""
+    conn = controller.get_db_connection()
+    report = run_analytics.load_analytics(conn, request.args.get('site'))
+    conn.close()
+    return render_template('analytics.html', report=report)
+
+@app.route('/api/analytics')
+def api_analytics():
+    """API endpoint for per-site, per-slot run analytics"""
+    conn = controller.get_db_connection()
+    report = run_analytics.load_analytics(conn, request.args.get('site'))
+    conn.close()
+    return jsonify(report)
+
 @app.route('/run-now/<int:schedule_id>')
 def run_now(schedule_id):
     """Manually trigger a schedule"""
@@ -569,7 +1275,7 @@ def run_now(schedule_id):
     ''', (schedule_id,)).fetchone()
 
     if schedule:
-        controller.start_bot_run(schedule)
+        controller.start_bot_run(schedule, manual=True)
 
     conn.close()
     return redirect(url_for('dashboard'))
@@ -620,7 +1326,31 @@ def screenshots():
         # Sort by modification time (newest first)
         screenshots_list.sort(key=lambda x: x['modified'], reverse=True)
 
-        return render_template('screenshots.html', screenshots=screenshots_list)
+        conn = controller.get_db_connection()
+        snapshots_list = conn.execute('''
+            SELECT content_hash, MAX(size_bytes) AS size_bytes, COUNT(*) AS captures,
+                   COUNT(DISTINCT run_id) AS runs, MAX(run_id) AS latest_run,
+                   GROUP_CONCAT(DISTINCT label) AS labels, MAX(created_at) AS last_seen
+            FROM run_artifacts
+            WHERE kind = 'dom'
+            GROUP BY content_hash
+            ORDER BY last_seen DESC
+            LIMIT 100
+        ''').fetchall()
+        snapshot_captures = conn.execute(
+            "SELECT COALESCE(SUM(size_bytes), 0) FROM run_artifacts WHERE kind = 'dom'"
+        ).fetchone()[0]
+        conn.close()
+
+        disk_usage = {
+            'screenshots': process_reaper.format_bytes(sum(f.stat().st_size for f in SCREENSHOTS_DIR.glob('*.png'))),
+            'snapshots': process_reaper.format_bytes(sum(f.stat().st_size for f in SNAPSHOTS_DIR.glob('*.json.gz'))),
+            'snapshot_captures': process_reaper.format_bytes(snapshot_captures),
+            'mode': BOT_ARTIFACTS
+        }
+
+        return render_template('screenshots.html', screenshots=screenshots_list,
+                               snapshots=snapshots_list, disk_usage=disk_usage)
     except Exception as e:
         flash(f'Error loading screenshots: {str(e)}', 'error')
         return redirect(url_for('dashboard'))
@@ -638,5 +1368,90 @@ def view_screenshot(filename):
     except Exception as e:
         return f"Error loading screenshot: {str(e)}", 500
 
+@app.route('/debug/snapshots/<content_hash>')
+@require_auth
+def view_snapshot(content_hash):
+    """Show a stored DOM snapshot and the runs that produced it (admin only)"""
+    try:
+        snapshot = dom_snapshot.load(content_hash, SNAPSHOTS_DIR)
+    except Exception as e:
+        return f"Error loading snapshot: {str(e)}", 500
+    if snapshot is None:
+        return "Snapshot not found", 404
+
+    conn = controller.get_db_connection()
+    captures = conn.execute('''
+        SELECT a.run_id, a.label, a.created_at, r.site_name, r.status
+        FROM run_artifacts a
+        LEFT JOIN bot_runs r ON r.id = a.run_id
+        WHERE a.kind = 'dom' AND a.content_hash = ?
+        ORDER BY a.id DESC
+        LIMIT 200
+    ''', (content_hash,)).fetchall()
+    conn.close()
+
+    return render_template('snapshot.html', content_hash=content_hash, snapshot=snapshot, captures=captures)
+
+@app.route('/debug/snapshots/<content_hash>/download')
+@require_auth
+def download_snapshot(content_hash):
+    """Serve the compressed snapshot file (admin only)"""
+    if not dom_snapshot.HASH_PATTERN.match(content_hash):
+        return "Snapshot not found", 404
+    path = SNAPSHOTS_DIR / f"{content_hash}.json.gz"
+    if not path.exists():
+        return "Snapshot not found", 404
+    return send_file(path.resolve(), mimetype='application/gzip', as_attachment=True, download_name=path.name)
+
+@app.route('/debug/profile')
+@require_auth
+def profile():
+    """Profiler control page (admin only)"""
+    # Captures only see this process; list the controller threads it actually hosts
+    controller_threads = sorted(
+        thread.name for thread in threading.enumerate()
+        if thread.name in ('scheduler', 'watchdog') or thread.name.startswith(run_search.RUN_THREAD_PREFIX)
+    )
+    return render_template('profile.html', status=profiler.status(), max_seconds=profiler.MAX_SECONDS,
+                           controller_threads=controller_threads)
+
+@app.route('/debug/profile/sample', methods=['POST'])
+@require_auth
+def profile_sample():
+    """Start a stack-sampling capture of all threads"""
+    seconds = request.form.get('seconds', 10, type=int)
+    if profiler.start_sampling(seconds):
+        flash(f'Sampling all threads for {seconds} seconds', 'success')
+    else:
+        flash('Another capture is already running', 'warning')
+    return redirect(url_for('profile'))
+
+@app.route('/debug/profile/tracemalloc', methods=['POST'])
+@require_auth
+def profile_tracemalloc():
+    """Start a tracemalloc snapshot diff"""
+    seconds = request.form.get('seconds', 30, type=int)
+    if profiler.start_tracemalloc_diff(seconds):
+        flash(f'Tracing allocations for {seconds} seconds', 'success')
+    else:
+        flash('Another capture is already running', 'warning')
+    return redirect(url_for('profile'))
+
+@app.route('/debug/profile/threads')
+@require_auth
+def profile_threads():
+    """Dump the current stack of every thread"""
+    return profiler.dump_thread_stacks(), 200, {'Content-Type': 'text/plain; charset=utf-8'}
+
+@app.route('/debug/profile/download/<name>')
+@require_auth
+def profile_download(name):
+    """Download a finished capture (collapsed, pstats or tracemalloc)"""
+    result = profiler.get_result(name)
+    if not result:
+        return "Capture not found", 404
+    return send_file(io.BytesIO(result['data']), mimetype=result['mimetype'],
+                     as_attachment=True, download_name=result['filename'])
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5005)
\ No newline at end of file
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+DOM snapshots
+Compact, gzip-compressed captures of the form (or page body) and field state,
+stored once per distinct content under snapshots/<sha256>.json.gz
+"""
+
+import re
+import gzip
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+
+SNAPSHOTS_DIR = Path("snapshots")
+MAX_HTML_CHARS = 200000   # markup kept per snapshot before compression
+MAX_TEXT_CHARS = 500      # per validation/alert message
+REDACTED = '[redacted]'
+
+# Values that change on every page load; redacted so identical pages hash the same
+VOLATILE_FIELDS = ('_token', 'captcha_input')
+
+HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+TOKEN_INPUT = re.compile(r'<input[^>]*name="_token"[^>]*>', re.IGNORECASE)
+VALUE_ATTRIBUTE = re.compile(r'(value=")[^"]*(")')
+CAPTCHA_BOX = re.compile(r'(<div[^>]*id="captcha-box"[^>]*>)[^<]*(</div>)', re.IGNORECASE)
+
+# Runs in the page via execute_script; scripts/styles are dropped from the copy
+CAPTURE_SCRIPT = """
+const visible = el => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+const form = document.querySelector('form');
+const root = (form || document.body).cloneNode(true);
+root.querySelectorAll('script, style, noscript, svg, link, iframe').forEach(el => el.remove());
+const fields = Array.from(document.querySelectorAll('input, select, textarea')).map(el => ({
+    id: el.id || null,
+    name: el.name || null,
+    type: el.type || el.tagName.toLowerCase(),
+    value: el.type === 'checkbox' || el.type === 'radio' ? null : el.value,
+    checked: el.type === 'checkbox' || el.type === 'radio' ? el.checked : null,
+    valid: el.checkValidity ? el.checkValidity() : null,
+    validation_message: el.validationMessage || null,
+    visible: visible(el)
+}));
+const messages = Array.from(document.querySelectorAll(
+    '.alert, .invalid-feedback, .text-danger, .is-invalid, .error, [role="alert"]'
+)).map(el => ({
+    id: el.id || null,
+    classes: el.className || null,
+    text: (el.innerText || el.textContent || '').trim(),
+    visible: visible(el)
+})).filter(message => message.text);
+const captcha = document.getElementById('captcha-box');
+return {
+    url: location.href,
+    title: document.title,
+    form_found: !!form,
+    html: root.outerHTML,
+    fields: fields,
+    messages: messages,
+    captcha_text: captcha ? captcha.textContent : null
+};
+"""
+
+
+def redact_html(markup):
+    """Blank the CSRF token and captcha text in captured markup"""
+    markup = TOKEN_INPUT.sub(lambda match: VALUE_ATTRIBUTE.sub(rf'\g<1>{REDACTED}\g<2>', match.group(0)), markup)
+    return CAPTCHA_BOX.sub(rf'\g<1>{REDACTED}\g<2>', markup)
+
+
+def normalize(state):
+    """Redact per-load values and cap sizes so repeated identical pages dedupe.
+
+    Whether the typed captcha matched the box is kept as captcha_matches,
+    which is the part that matters when debugging a rejected submission.
+    """
+    fields = state.get('fields') or []
+    captcha_text = ''.join((state.get('captcha_text') or '').split())
+    captcha_value = next((field.get('value') for field in fields if field.get('id') == 'captcha_input'), None)
+
+    for field in fields:
+        if (field.get('name') in VOLATILE_FIELDS or field.get('id') in VOLATILE_FIELDS) and field.get('value'):
+            field['value'] = REDACTED
+
+    markup = redact_html(state.get('html') or '')
+    for message in state.get('messages') or []:
+        message['text'] = message['text'][:MAX_TEXT_CHARS]
+
+    return {
+        'url': state.get('url'),
+        'title': state.get('title'),
+        'form_found': bool(state.get('form_found')),
+        'captcha_matches': captcha_value == captcha_text if captcha_text and captcha_value is not None else None,
+        'fields': fields,
+        'messages': state.get('messages') or [],
+        'html': markup[:MAX_HTML_CHARS],
+        'html_truncated': len(markup) > MAX_HTML_CHARS,
+    }
+
+
+def store(state, directory=SNAPSHOTS_DIR):
+    """Normalize and write a snapshot unless identical content already exists.
+
+    Returns (path, content_hash, size_bytes, created).
+    """
+    snapshot = normalize(state)
+    payload = json.dumps(snapshot, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    content_hash = hashlib.sha256(payload).hexdigest()
+
+    directory = Path(directory)
+    directory.mkdir(exist_ok=True)
+    path = directory / f"{content_hash}.json.gz"
+    created = not path.exists()
+    if created:
+        # Unique temp file per writer: run threads often save the same page at once.
+        # mtime=0 keeps the gzip bytes stable, so whichever replace lands last is identical
+        with tempfile.NamedTemporaryFile(dir=directory, prefix=f".{content_hash}.", delete=False) as temp_file:
+            temp_file.write(gzip.compress(payload, mtime=0))
+        Path(temp_file.name).replace(path)
+    return str(path), content_hash, path.stat().st_size, created
+
+
+def load(content_hash, directory=SNAPSHOTS_DIR):
+    """Read a stored snapshot back; None if the hash is malformed or unknown"""
+    if not HASH_PATTERN.match(content_hash or ''):
+        return None
+    path = Path(directory) / f"{content_hash}.json.gz"
+    if not path.exists():
+        return None
+    return json.loads(gzip.decompress(path.read_bytes()).decode('utf-8'))
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Chrome / ChromeDriver process reaper
+Finds, measures and kills browser process trees left behind by bot runs (Linux /proc based)
+"""
+
+import os
+import time
+import signal
+import logging
+from pathlib import Path
+
+PROC_DIR = Path("/proc")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+DRIVER_NAMES = ("chromedriver",)
+BROWSER_NAMES = ("chrome", "chromium", "chromium-browse", "google-chrome", "headless_shell")
+OWNER_NAMES = ("python", "gunicorn")  # processes that start chromedriver through selenium
+
+
+def read_process(pid):
+    """Read basic info for one process, or None if it is gone"""
+    base = PROC_DIR / str(pid)
+    try:
+        stat = (base / "stat").read_text()
+        # comm may contain spaces/parens, so split after the last ')'
+        fields = stat[stat.rindex(")") + 2:].split()
+        name = (base / "comm").read_text().strip()
+        cmdline = (base / "cmdline").read_bytes().split(b"\0")
+        rss_pages = int((base / "statm").read_text().split()[1])
+        uid = base.stat().st_uid
+    except (FileNotFoundError, ProcessLookupError, PermissionError, ValueError, IndexError):
+        return None
+
+    return {
+        'pid': int(pid),
+        'ppid': int(fields[1]),
+        'name': name,
+        'cmdline': [part.decode(errors='replace') for part in cmdline if part],
+        'rss': rss_pages * PAGE_SIZE,
+        'uid': uid,
+        'start_ticks': int(fields[19]),
+    }
+
+
+def list_processes():
+    """Snapshot of all visible processes as {pid: info}"""
+    processes = {}
+    if not PROC_DIR.exists():
+        return processes
+    for entry in PROC_DIR.iterdir():
+        if entry.name.isdigit():
+            info = read_process(entry.name)
+            if info:
+                processes[info['pid']] = info
+    return processes
+
+
+def process_age(info):
+    """Seconds since the process started"""
+    try:
+        uptime = float((PROC_DIR / "uptime").read_text().split()[0])
+    except (OSError, ValueError):
+        return 0.0
+    return uptime - info['start_ticks'] / CLOCK_TICKS
+
+
+def process_tree(pid, processes=None):
+    """Return the pids of a process and all of its descendants"""
+    if processes is None:
+        processes = list_processes()
+
+    children = {}
+    for info in processes.values():
+        children.setdefault(info['ppid'], []).append(info['pid'])
+
+    tree = []
+    stack = [pid] if pid in processes else []
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, []))
+    return tree
+
+
+def is_driver_process(info):
+    return info['name'] in DRIVER_NAMES
+
+
+def is_browser_process(info):
+    """Chrome started by WebDriver (it always gets a remote debugging port)"""
+    if not info['name'].startswith(BROWSER_NAMES):
+        return False
+    return any(arg.startswith('--remote-debugging-port') for arg in info['cmdline'])
+
+
+def is_attached_driver(pid, processes=None):
+    """chromedriver still owned by another live Python process.
+
+    Selenium starts chromedriver as a child of the bot's process; when that
+    process dies the driver is re-parented to init (or a subreaper).
+    """
+    if not pid:
+        return False
+    if processes is None:
+        processes = list_processes()
+    info = processes.get(pid)
+    if not info or not is_driver_process(info):
+        return False
+    parent = processes.get(info['ppid'])
+    if parent is None or parent['pid'] == os.getpid():
+        return False
+    program = os.path.basename(parent['cmdline'][0]) if parent['cmdline'] else ''
+    return parent['name'].startswith(OWNER_NAMES) or program.startswith(OWNER_NAMES)
+
+
+def is_orphaned_browser_child(info, processes):
+    """Chrome helper (renderer, gpu, zygote) whose browser process is gone"""
+    if not info['name'].startswith(BROWSER_NAMES):
+        return False
+    if not any(arg.startswith('--type=') for arg in info['cmdline']):
+        return False
+    parent = processes.get(info['ppid'])
+    return parent is None or not parent['name'].startswith(BROWSER_NAMES)
+
+
+def kill_pids(pids, processes=None, grace=3.0):
+    """SIGTERM a set of pids, SIGKILL whatever survives the grace period.
+
+    Returns (killed_count, freed_bytes) based on RSS measured before the kill.
+    """
+    if processes is None:
+        processes = list_processes()
+
+    targets = [pid for pid in pids if pid in processes and pid != os.getpid()]
+    freed = sum(processes[pid]['rss'] for pid in targets)
+
+    for pid in targets:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    deadline = time.time() + grace
+    alive = targets
+    while alive and time.time() < deadline:
+        time.sleep(0.1)
+        alive = [pid for pid in alive if read_process(pid)]
+
+    for pid in alive:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    return len(targets), freed
+
+
+def kill_process_tree(pid):
+    """Kill a chromedriver and every browser process under it.
+
+    The tree is snapshotted before anything is signalled, because Chrome
+    children get re-parented to init as soon as chromedriver exits.
+    Returns (killed_count, freed_bytes).
+    """
+    if not pid:
+        return 0, 0
+
+    processes = list_processes()
+    info = processes.get(pid)
+    # Guard against pid reuse: only kill if it still looks like a driver
+    if not info or not (is_driver_process(info) or is_browser_process(info)):
+        return 0, 0
+
+    killed, freed = kill_pids(process_tree(pid, processes), processes)
+    if killed:
+        logging.info(f"Killed process tree of {pid}: {killed} processes, {format_bytes(freed)} freed")
+    return killed, freed
+
+
+def reap_orphans(owned_pids, min_age=120):
+    """Kill chromedriver/Chrome processes that no known run owns.
+
+    owned_pids: driver pids of runs that are still tracked
+    min_age: ignore processes younger than this (a run may still be starting)
+    Returns (killed_count, freed_bytes).
+    """
+    processes = list_processes()
+    uid = os.getuid()
+
+    owned = set()
+    for pid in owned_pids:
+        if pid:
+            owned.update(process_tree(pid, processes))
+
+    stray_roots = [
+        info['pid'] for info in processes.values()
+        if info['uid'] == uid
+        and info['pid'] not in owned
+        and (is_driver_process(info) or is_browser_process(info)
+             or is_orphaned_browser_child(info, processes))
+        and process_age(info) >= min_age
+    ]
+
+    stray = set()
+    for pid in stray_roots:
+        stray.update(process_tree(pid, processes))
+    stray -= owned
+
+    if not stray:
+        return 0, 0
+
+    killed, freed = kill_pids(stray, processes)
+    logging.info(f"Reaped {killed} orphaned Chrome processes, {format_bytes(freed)} freed")
+    return killed, freed
+
+
+def format_bytes(size):
+    """Human readable byte count"""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+On-demand profiler
+Stack sampling of all threads, tracemalloc diffs and thread dumps for the live dashboard process.
+Nothing here runs (no hooks, no tracing) until a capture is requested.
+"""
+
+import os
+import sys
+import time
+import marshal
+import logging
+import threading
+import traceback
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+MAX_SECONDS = 120
+DEFAULT_INTERVAL = 0.005  # seconds between stack samples
+TRACEMALLOC_FRAMES = 10
+TOP_ALLOCATIONS = 50
+
+_lock = threading.Lock()
+_active = None   # description of the capture in progress
+_results = {}    # name -> {'filename', 'mimetype', 'data', 'created'}
+
+
+def thread_names():
+    """Map thread ident -> thread name"""
+    return {thread.ident: thread.name for thread in threading.enumerate()}
+
+
+def frame_key(frame):
+    code = frame.f_code
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+def frame_label(key):
+    filename, lineno, name = key
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+def collect_samples(seconds, interval=DEFAULT_INTERVAL):
+    """Sample every thread's stack for a while.
+
+    Returns (Counter of (thread_name, (frame_key, ...root first)), sample_count).
+    """
+    own_ident = threading.get_ident()
+    samples = Counter()
+    rounds = 0
+    deadline = time.monotonic() + seconds
+
+    while time.monotonic() < deadline:
+        names = thread_names()
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_key(frame))
+                frame = frame.f_back
+            stack.reverse()
+            samples[(names.get(ident, f"thread-{ident}"), tuple(stack))] += 1
+        rounds += 1
+        time.sleep(interval)
+
+    return samples, rounds
+
+
+def to_collapsed(samples):
+    """Brendan Gregg collapsed-stack format (one 'a;b;c count' per line)"""
+    lines = []
+    for (thread_name, stack), count in samples.most_common():
+        frames = [thread_name.replace(';', ':')] + [frame_label(key).replace(';', ':') for key in stack]
+        lines.append(f"{';'.join(frames)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def to_pstats(samples, interval):
+    """Convert samples to a marshalled stats dict loadable with pstats.Stats(path).
+
+    Each sample counts as one 'call' lasting one interval: tottime is time at
+    the top of the stack, cumtime is time anywhere on it.
+    """
+    stats = {}
+
+    def entry(key):
+        if key not in stats:
+            stats[key] = [0, 0, 0.0, 0.0, {}]
+        return stats[key]
+
+    for (_, stack), count in samples.items():
+        if not stack:
+            continue
+        weight = count * interval
+        for key in set(stack):
+            func = entry(key)
+            func[0] += count
+            func[1] += count
+            func[3] += weight
+        entry(stack[-1])[2] += weight
+        for caller, callee in set(zip(stack, stack[1:])):
+            callers = entry(callee)[4]
+            nc, cc, tt, ct = callers.get(caller, (0, 0, 0.0, 0.0))
+            callers[caller] = (nc + count, cc + count, tt, ct + weight)
+
+    return marshal.dumps({key: (cc, nc, tt, ct, callers) for key, (cc, nc, tt, ct, callers) in stats.items()})
+
+
+def dump_thread_stacks():
+    """Current stack of every thread as text"""
+    names = thread_names()
+    parts = [f"Thread dump at {datetime.now().isoformat()} (pid {os.getpid()})\n"]
+    for ident, frame in sys._current_frames().items():
+        parts.append(f"\n--- {names.get(ident, 'unknown')} (ident {ident}) ---\n")
+        parts.extend(traceback.format_stack(frame))
+    return "".join(parts)
+
+
+def store_result(name, filename, mimetype, data):
+    _results[name] = {
+        'filename': filename,
+        'mimetype': mimetype,
+        'data': data,
+        'created': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def get_result(name):
+    return _results.get(name)
+
+
+def status():
+    """What is running and which captures can be downloaded"""
+    return {
+        'active': _active,
+        'results': {
+            name: {'filename': result['filename'], 'size': len(result['data']), 'created': result['created']}
+            for name, result in _results.items()
+        },
+    }
+
+
+def _run_exclusive(description, target, *args):
+    """Run one capture at a time in a background thread"""
+    global _active
+    if not _lock.acquire(blocking=False):
+        return False
+    _active = description
+
+    def runner():
+        global _active
+        try:
+            target(*args)
+        except Exception as e:
+            logging.error(f"Profiler capture failed: {e}")
+        finally:
+            _active = None
+            _lock.release()
+
+    threading.Thread(target=runner, name='profiler', daemon=True).start()
+    return True
+
+
+def _sample(seconds, interval):
+    samples, rounds = collect_samples(seconds, interval)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    store_result('collapsed', f"profile_{stamp}.collapsed", 'text/plain', to_collapsed(samples).encode())
+    store_result('pstats', f"profile_{stamp}.pstats", 'application/octet-stream', to_pstats(samples, interval))
+    logging.info(f"Profiler: {rounds} sampling rounds over {seconds}s")
+
+
+def _tracemalloc_diff(seconds):
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    try:
+        before = tracemalloc.take_snapshot()
+        time.sleep(seconds)
+        after = tracemalloc.take_snapshot()
+    finally:
+        if started_here:
+            tracemalloc.stop()
+
+    stats = after.compare_to(before, 'lineno')
+    lines = [f"tracemalloc diff over {seconds}s, top {TOP_ALLOCATIONS} by size change\n"]
+    lines.extend(f"{stat}\n" for stat in stats[:TOP_ALLOCATIONS])
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    store_result('tracemalloc', f"tracemalloc_{stamp}.txt", 'text/plain', "".join(lines).encode())
+
+
+def start_sampling(seconds, interval=DEFAULT_INTERVAL):
+    """Start a stack-sampling capture; False if another capture is running"""
+    seconds = max(1, min(seconds, MAX_SECONDS))
+    return _run_exclusive(f"stack sampling for {seconds}s", _sample, seconds, interval)
+
+
+def start_tracemalloc_diff(seconds):
+    """Start a tracemalloc snapshot diff; False if another capture is running"""
+    seconds = max(1, min(seconds, MAX_SECONDS))
+    return _run_exclusive(f"tracemalloc diff for {seconds}s", _tracemalloc_diff, seconds)
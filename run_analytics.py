@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Per-site run analytics
+Incrementally maintained counters and histograms so reports never scan bot_runs
+"""
+
+import bisect
+
+# Bucket upper bounds (inclusive); values above the last bound land in the overflow bucket
+DURATION_BUCKETS = [1, 2, 5, 10, 20, 30, 60, 120, 180, 300, 600, 900, 1200, 1800, 3600]  # seconds
+ATTEMPT_BUCKETS = [1, 2, 3, 5, 8, 10, 15, 20, 30, 50, 75, 100, 150, 200]
+
+METRIC_BUCKETS = {
+    'duration': DURATION_BUCKETS,
+    'attempts': ATTEMPT_BUCKETS,
+}
+
+OUTCOMES = ('success', 'timeout', 'failed', 'cancelled', 'interrupted')
+FINAL_STATUSES = set(OUTCOMES)
+
+MANUAL_SLOT = 'manual'
+
+
+def bucket_index(metric, value):
+    """Index of the histogram bucket a value falls into"""
+    return bisect.bisect_left(METRIC_BUCKETS[metric], value)
+
+
+def record_run(conn, site_name, slot, status, duration, attempts):
+    """Fold one finished run into run_stats and run_histogram (caller commits)"""
+    slot = slot or MANUAL_SLOT
+    outcome = status if status in FINAL_STATUSES else 'failed'
+
+    conn.execute(f'''
+        INSERT INTO run_stats (site_name, slot, runs, {outcome}, total_duration, max_duration, max_attempts)
+        VALUES (?, ?, 1, 1, ?, ?, ?)
+        ON CONFLICT (site_name, slot) DO UPDATE SET
+            runs = runs + 1,
+            {outcome} = {outcome} + 1,
+            total_duration = total_duration + excluded.total_duration,
+            max_duration = MAX(max_duration, excluded.max_duration),
+            max_attempts = MAX(max_attempts, excluded.max_attempts)
+    ''', (site_name, slot, duration, duration, attempts))
+
+    for metric, value in (('duration', duration), ('attempts', attempts)):
+        conn.execute('''
+            INSERT INTO run_histogram (site_name, slot, metric, bucket, count)
+            VALUES (?, ?, ?, ?, 1)
+            ON CONFLICT (site_name, slot, metric, bucket) DO UPDATE SET count = count + 1
+        ''', (site_name, slot, metric, bucket_index(metric, value)))
+
+
+def percentile(metric, counts, fraction, observed_max):
+    """Approximate a percentile from bucket counts.
+
+    Returns the upper bound of the bucket holding the percentile, capped at
+    the observed maximum (which also stands in for the overflow bucket).
+    """
+    total = sum(counts.values())
+    if not total:
+        return None
+
+    bounds = METRIC_BUCKETS[metric]
+    target = fraction * total
+    cumulative = 0
+    for index in sorted(counts):
+        cumulative += counts[index]
+        if cumulative >= target:
+            upper = bounds[index] if index < len(bounds) else observed_max
+            return min(upper, observed_max)
+    return observed_max
+
+
+def load_analytics(conn, site_name=None):
+    """Build the per site/slot report from the precomputed tables"""
+    query = "SELECT * FROM run_stats"
+    params = []
+    if site_name:
+        query += " WHERE site_name = ?"
+        params.append(site_name)
+    stats_rows = conn.execute(query + " ORDER BY site_name, slot", params).fetchall()
+
+    histograms = {}
+    query = "SELECT site_name, slot, metric, bucket, count FROM run_histogram"
+    if site_name:
+        query += " WHERE site_name = ?"
+    for row in conn.execute(query, params):
+        key = (row['site_name'], row['slot'], row['metric'])
+        histograms.setdefault(key, {})[row['bucket']] = row['count']
+
+    report = []
+    for row in stats_rows:
+        key = (row['site_name'], row['slot'])
+        durations = histograms.get(key + ('duration',), {})
+        attempts = histograms.get(key + ('attempts',), {})
+        report.append({
+            'site_name': row['site_name'],
+            'slot': row['slot'],
+            'runs': row['runs'],
+            'outcomes': {outcome: row[outcome] for outcome in OUTCOMES},
+            'success_rate': round(row['success'] / row['runs'] * 100, 1) if row['runs'] else 0,
+            'duration': {
+                'p50': percentile('duration', durations, 0.5, row['max_duration']),
+                'p90': percentile('duration', durations, 0.9, row['max_duration']),
+                'max': row['max_duration'],
+                'mean': round(row['total_duration'] / row['runs'], 1) if row['runs'] else None,
+            },
+            'attempts': {
+                'p50': percentile('attempts', attempts, 0.5, row['max_attempts']),
+                'p90': percentile('attempts', attempts, 0.9, row['max_attempts']),
+                'max': row['max_attempts'],
+            },
+        })
+    return report
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Run text search
+SQLite FTS5 index over run error messages, per-run log lines and result-page summaries
+"""
+
+import re
+import html
+import logging
+import threading
+
+KINDS = ('error', 'log', 'result')
+RUN_THREAD_PREFIX = 'bot-run-'
+LOG_FORMAT = '%(levelname)s - %(message)s'
+MAX_RESULTS = 200
+
+# Private-use markers so snippets can be HTML-escaped before highlighting
+MARK_START = '\ue000'
+MARK_END = '\ue001'
+
+
+class RunLogHandler(logging.Handler):
+    """Buffers log lines emitted from bot run threads until the controller indexes them"""
+
+    def __init__(self):
+        super().__init__(level=logging.INFO)
+        self.setFormatter(logging.Formatter(LOG_FORMAT))
+        self.buffers = {}  # run_id -> [(created, line)]
+        self.buffer_lock = threading.Lock()
+
+    def emit(self, record):
+        thread_name = threading.current_thread().name
+        if not thread_name.startswith(RUN_THREAD_PREFIX):
+            return
+        try:
+            run_id = int(thread_name[len(RUN_THREAD_PREFIX):])
+            line = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self.buffer_lock:
+            self.buffers.setdefault(run_id, []).append((record.created, line))
+
+    def drain(self, run_id):
+        """Take the buffered (created, line) pairs for a run"""
+        with self.buffer_lock:
+            return self.buffers.pop(run_id, [])
+
+
+def install_run_log_capture(console_loggers=()):
+    """Attach a RunLogHandler to the root logger and return it.
+
+    Bot code logs at INFO, which the root logger drops by default, so the
+    root level is lowered to INFO. Existing handlers keep their old level
+    (and a WARNING stderr handler stands in for logging's last resort) so
+    nothing new shows up in the console or journal.
+
+    console_loggers are (logger, handler) pairs for loggers that add their
+    own console handler only when the root has none (werkzeug, Flask's
+    app.logger). Once the stand-in handler exists they would skip it and
+    their INFO output would vanish, so they get that handler here and stop
+    propagating, exactly as when the root had no handlers.
+    """
+    root = logging.getLogger()
+    for handler in root.handlers:
+        if isinstance(handler, RunLogHandler):
+            return handler
+
+    previous_level = root.getEffectiveLevel()
+
+    if previous_level > logging.INFO:
+        if not root.handlers:
+            fallback = logging.StreamHandler()
+            fallback.setLevel(previous_level)
+            root.addHandler(fallback)
+            for logger, console_handler in console_loggers:
+                if console_handler not in logger.handlers:
+                    logger.addHandler(console_handler)
+                logger.propagate = False
+        for handler in root.handlers:
+            if handler.level == logging.NOTSET:
+                handler.setLevel(previous_level)
+        root.setLevel(logging.INFO)
+
+    handler = RunLogHandler()
+    root.addHandler(handler)
+    return handler
+
+
+def insert_entries(conn, run_id, site_name, entries):
+    """Index [(kind, text, created_at datetime)] for a run (caller commits)"""
+    conn.executemany('''
+        INSERT INTO run_text (content, kind, run_id, site_name, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [
+        (text, kind, run_id, site_name, created_at.strftime('%Y-%m-%d %H:%M:%S'))
+        for kind, text, created_at in entries if text
+    ])
+
+
+def build_match_query(text):
+    """Turn free text into an FTS5 query: every word must match, last one as a prefix.
+
+    Words are quoted so punctuation in error messages (driver-init, _token:)
+    can't produce FTS5 syntax errors.
+    """
+    terms = re.findall(r'\w+', text, re.UNICODE)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def highlight(snippet):
+    """HTML-escape a snippet and turn the FTS markers into <mark> tags"""
+    return html.escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+def search(conn, text, kind=None, site_name=None, limit=50):
+    """Ranked search over the index; returns a list of result dicts"""
+    match = build_match_query(text)
+    if not match:
+        return []
+
+    query = '''
+        SELECT run_id, kind, site_name, created_at,
+               snippet(run_text, 0, ?, ?, '…', 16) AS snippet,
+               bm25(run_text) AS score
+        FROM run_text
+        WHERE run_text MATCH ?
+    '''
+    params = [MARK_START, MARK_END, match]
+    if kind in KINDS:
+        query += " AND kind = ?"
+        params.append(kind)
+    if site_name:
+        query += " AND site_name = ?"
+        params.append(site_name)
+    query += " ORDER BY rank LIMIT ?"
+    params.append(max(1, min(limit, MAX_RESULTS)))
+
+    return [
+        {
+            'run_id': row['run_id'],
+            'kind': row['kind'],
+            'site_name': row['site_name'],
+            'created_at': row['created_at'],
+            'snippet': highlight(row['snippet']),
+            'score': round(row['score'], 3),
+        }
+        for row in conn.execute(query, params)
+    ]
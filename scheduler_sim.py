@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Scheduler simulation
+Replays a full WIB day of schedules through the real scheduler path
+(scheduler_loop -> check_and_run_scheduled_bots -> start_bot_run -> run_bot_instance)
+on a virtual clock with a stub bot, and reports fire delay, missed fires,
+duplicate runs, DB queries per tick and thread count.
+
+Usage:
+    python scheduler_sim.py --schedules 6 --scale 1 10 100
+"""
+
+import os
+import sys
+import json
+import time
+import heapq
+import random
+import sqlite3
+import logging
+import argparse
+import tempfile
+import itertools
+import threading
+from pathlib import Path
+from datetime import datetime, timedelta
+
+REPO_DIR = Path(__file__).resolve().parent
+
+# War times used by seed_antam_sites.py; many schedules pile up on these minutes
+HOTSPOT_TIMES = ["07:00", "07:30", "15:00"]
+
+# Real seconds to wait for a busy thread before declaring the simulation stuck
+STALL_TIMEOUT = 30
+
+
+class VirtualClock:
+    """Discrete-event clock for BotController.
+
+    Time only moves when every thread started through spawn() is asleep in
+    sleep(); it then jumps straight to the earliest wake-up. A day of
+    60-second scheduler ticks therefore replays as fast as the code runs.
+    """
+
+    def __init__(self, start, on_advance=None):
+        self._now = start
+        self._cond = threading.Condition()
+        self._busy = 0          # managed threads not currently sleeping
+        self._wakeups = []      # heap of (wake_time, seq)
+        self._seq = itertools.count()
+        self.on_advance = on_advance
+
+    def now(self):
+        with self._cond:
+            return self._now
+
+    def sleep(self, seconds):
+        with self._cond:
+            wake = self._now + timedelta(seconds=seconds)
+            if wake <= self._now:
+                return
+            heapq.heappush(self._wakeups, (wake, next(self._seq)))
+            self._busy -= 1
+            self._cond.notify_all()
+            # run_until() counts us busy again before moving time past `wake`
+            while self._now < wake:
+                self._cond.wait()
+
+    def spawn(self, target, args=(), name=None):
+        def run():
+            try:
+                target(*args)
+            finally:
+                with self._cond:
+                    self._busy -= 1
+                    self._cond.notify_all()
+
+        with self._cond:
+            self._busy += 1
+        thread = threading.Thread(target=run, name=name, daemon=True)
+        thread.start()
+        return thread
+
+    def run_until(self, end):
+        """Advance time event by event until nothing is due before `end`"""
+        with self._cond:
+            while True:
+                waited = time.monotonic()
+                while self._busy > 0:
+                    if not self._cond.wait(timeout=1) and time.monotonic() - waited > STALL_TIMEOUT:
+                        raise RuntimeError(f"Simulation stalled at {self._now}: {self._busy} threads busy")
+
+                if not self._wakeups or self._wakeups[0][0] > end:
+                    self._now = max(self._now, end)
+                    return
+
+                self._now = self._wakeups[0][0]
+                while self._wakeups and self._wakeups[0][0] <= self._now:
+                    heapq.heappop(self._wakeups)
+                    self._busy += 1
+                if self.on_advance:
+                    self.on_advance(self._now)
+                self._cond.notify_all()
+
+
+class SimulatedBot:
+    """Stand-in for ANTAMQueueBot: each attempt takes attempt_seconds of virtual time"""
+
+    driver_pid = None
+
+    def __init__(self, clock, attempt_seconds, success_rate, rng):
+        self.clock = clock
+        self.attempt_seconds = attempt_seconds
+        self.success_rate = success_rate
+        self.rng = rng
+        self.user_data = {}
+
+    def fill_form(self, site_url):
+        self.clock.sleep(self.attempt_seconds)
+        return self.rng.random() < self.success_rate
+
+    def cleanup(self):
+        pass
+
+
+def generate_schedules(count, cluster, rng):
+    """HH:MM times for a day; a `cluster` fraction lands on the hotspot minutes"""
+    times = []
+    for _ in range(count):
+        if rng.random() < cluster:
+            times.append(rng.choice(HOTSPOT_TIMES))
+        else:
+            minute = rng.randrange(24 * 60)
+            times.append(f"{minute // 60:02d}:{minute % 60:02d}")
+    return times
+
+
+def summarize(values):
+    if not values:
+        return {'p50': None, 'p90': None, 'max': None, 'mean': None}
+    ordered = sorted(values)
+    return {
+        'p50': round(ordered[len(ordered) // 2], 3),
+        'p90': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))], 3),
+        'max': round(ordered[-1], 3),
+        'mean': round(sum(ordered) / len(ordered), 3),
+    }
+
+
+def simulate(schedule_count, args, workdir):
+    """Replay one day with `schedule_count` schedules; returns a metrics dict"""
+    import bot_dashboard
+
+    rng = random.Random(args.seed)
+    random.seed(args.seed)  # run_bot_instance's pause between attempts
+
+    day = bot_dashboard.WIB.localize(datetime.strptime(args.date, "%Y-%m-%d"))
+    thread_counts = []
+    clock = VirtualClock(
+        day + timedelta(seconds=args.start_offset),
+        on_advance=lambda now: thread_counts.append(threading.active_count())
+    )
+
+    db_path = str(workdir / f"sim_{schedule_count}.db")
+    controller = bot_dashboard.BotController(
+        db_path=db_path,
+        clock=clock,
+        bot_factory=lambda: SimulatedBot(clock, args.attempt_seconds, args.success_rate, rng),
+        autostart=False
+    )
+
+    # Count statements issued by the scheduler thread, per tick
+    scheduler_queries = [0]
+    original_connection = controller.get_db_connection
+
+    def traced_connection():
+        conn = original_connection()
+        if threading.current_thread().name == 'scheduler':
+            conn.set_trace_callback(lambda statement: scheduler_queries.__setitem__(0, scheduler_queries[0] + 1))
+        return conn
+
+    controller.get_db_connection = traced_connection
+
+    tick_queries = []
+    tick_seconds = []
+    original_check = controller.check_and_run_scheduled_bots
+
+    def timed_check():
+        before = scheduler_queries[0]
+        started = time.perf_counter()
+        original_check()
+        elapsed = time.perf_counter() - started
+        tick_queries.append(scheduler_queries[0] - before)
+        tick_seconds.append(elapsed)
+        if args.charge_real_time:
+            # Let real processing time push the next tick back, like it does in production
+            clock.sleep(elapsed)
+
+    controller.check_and_run_scheduled_bots = timed_check
+
+    # Seed the day's schedules, one site each (like add-task does)
+    times = generate_schedules(schedule_count, args.cluster, rng)
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        INSERT OR REPLACE INTO user_settings (id, name, ktp_last_6, phone_number)
+        VALUES (1, 'Sim User', '123456', '081234567890')
+    ''')
+    for index, scheduled_time in enumerate(times):
+        site_id = conn.execute(
+            "INSERT INTO sites (name, url) VALUES (?, ?)", (f"Sim {index}", f"http://sim.invalid/{index}")
+        ).lastrowid
+        conn.execute(
+            "INSERT INTO schedules (site_id, scheduled_time, duration_minutes, enabled) VALUES (?, ?, ?, 1)",
+            (site_id, scheduled_time, args.duration_minutes)
+        )
+    conn.commit()
+
+    started = time.perf_counter()
+    controller.start_scheduler()
+    day_end = day + timedelta(days=1)
+    clock.run_until(day_end - timedelta(seconds=1))
+    controller.scheduler_running = False
+    # Let runs started late in the day finish (the scheduler just keeps sleeping)
+    clock.run_until(day_end + timedelta(minutes=args.duration_minutes + 5))
+    wall_seconds = time.perf_counter() - started
+
+    rows = conn.execute('''
+        SELECT s.id, s.scheduled_time, r.started_at, r.status
+        FROM schedules s
+        LEFT JOIN bot_runs r ON r.schedule_id = s.id
+    ''').fetchall()
+    conn.close()
+
+    runs_per_schedule = {}
+    fire_delays = []
+    statuses = {}
+    for schedule_id, scheduled_time, started_at, status in rows:
+        runs_per_schedule.setdefault(schedule_id, 0)
+        if started_at is None:
+            continue
+        runs_per_schedule[schedule_id] += 1
+        statuses[status] = statuses.get(status, 0) + 1
+        hour, minute = map(int, scheduled_time.split(':'))
+        due = (day + timedelta(hours=hour, minutes=minute)).timestamp()
+        fire_delays.append(started_at - due)
+
+    return {
+        'schedules': schedule_count,
+        'runs': len(fire_delays),
+        'statuses': statuses,
+        'missed_fires': sum(1 for count in runs_per_schedule.values() if count == 0),
+        'duplicate_runs': sum(count - 1 for count in runs_per_schedule.values() if count > 1),
+        'fire_delay_s': summarize(fire_delays),
+        'ticks': len(tick_queries),
+        'db_queries_per_tick': summarize(tick_queries),
+        'tick_ms': summarize([seconds * 1000 for seconds in tick_seconds]),
+        'threads': {'peak': max(thread_counts, default=0), 'mean': summarize(thread_counts)['mean']},
+        'wall_seconds': round(wall_seconds, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a WIB day of schedules on a virtual clock")
+    parser.add_argument('--schedules', type=int, default=6, help="base schedule count (seed_antam_sites.py has 6)")
+    parser.add_argument('--scale', type=int, nargs='+', default=[1, 10, 100], help="multipliers of --schedules")
+    parser.add_argument('--cluster', type=float, default=0.5, help="fraction of schedules on hotspot minutes")
+    parser.add_argument('--duration-minutes', type=int, default=15)
+    parser.add_argument('--attempt-seconds', type=float, default=5.0, help="virtual time per fill_form")
+    parser.add_argument('--success-rate', type=float, default=0.2, help="chance an attempt succeeds")
+    parser.add_argument('--start-offset', type=float, default=0.0, help="seconds after midnight the service starts")
+    parser.add_argument('--charge-real-time', action='store_true',
+                        help="advance the clock by each tick's real processing time")
+    parser.add_argument('--date', default=datetime.now().strftime("%Y-%m-%d"), help="WIB day to replay")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    output = Path(args.output).resolve() if args.output else None
+
+    # Importing the dashboard creates its global controller; keep it inert and out of the repo dir
+    workdir = Path(tempfile.mkdtemp(prefix='antam-sim-'))
+    os.chdir(workdir)
+    os.environ['ANTAM_BOT_AUTOSTART'] = '0'
+    sys.path.insert(0, str(REPO_DIR))
+
+    results = []
+    for scale in args.scale:
+        result = simulate(args.schedules * scale, args, workdir)
+        result['scale'] = scale
+        results.append(result)
+        print(
+            f"x{scale:<4} schedules={result['schedules']:<5} runs={result['runs']:<5} "
+            f"missed={result['missed_fires']:<3} dup={result['duplicate_runs']:<3} "
+            f"delay p50/max={result['fire_delay_s']['p50']}/{result['fire_delay_s']['max']}s "
+            f"queries/tick mean/max={result['db_queries_per_tick']['mean']}/{result['db_queries_per_tick']['max']} "
+            f"threads peak={result['threads']['peak']} wall={result['wall_seconds']}s"
+        )
+
+    if output:
+        output.write_text(json.dumps({'args': vars(args), 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Lightweight site probe
+Validates a registration form with one pooled HTTP request instead of launching Chrome
+"""
+
+import time
+import logging
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Same elements ANTAMQueueBot.test_site looks for
+REQUIRED_FORM_IDS = ["name", "ktp", "phone_number", "check", "check_2", "captcha_input"]
+CSRF_FIELD = "_token"
+
+PROBE_TIMEOUT = 10  # seconds
+MAX_PROBE_WORKERS = 8
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# One session for the whole process so connections are pooled and reused
+_session = requests.Session()
+_session.headers.update({'User-Agent': USER_AGENT})
+_adapter = HTTPAdapter(pool_connections=MAX_PROBE_WORKERS, pool_maxsize=MAX_PROBE_WORKERS)
+_session.mount('http://', _adapter)
+_session.mount('https://', _adapter)
+
+
+class FormScanner(HTMLParser):
+    """Collect element ids and input names, ignoring the rest once everything is found"""
+
+    def __init__(self, wanted_ids, wanted_names):
+        super().__init__()
+        self.missing_ids = set(wanted_ids)
+        self.missing_names = set(wanted_names)
+
+    def handle_starttag(self, tag, attrs):
+        if not self.missing_ids and not self.missing_names:
+            return
+        for key, value in attrs:
+            if key == 'id':
+                self.missing_ids.discard(value)
+            elif key == 'name':
+                self.missing_names.discard(value)
+
+
+def scan_form(html):
+    """Return (missing_ids, has_csrf_token) for a page's HTML"""
+    scanner = FormScanner(REQUIRED_FORM_IDS, [CSRF_FIELD])
+    scanner.feed(html)
+    scanner.close()
+    missing = [element_id for element_id in REQUIRED_FORM_IDS if element_id in scanner.missing_ids]
+    return missing, CSRF_FIELD not in scanner.missing_names
+
+
+def probe_site(url, timeout=PROBE_TIMEOUT):
+    """Fetch a site's form page and check it has everything the bot needs.
+
+    Returns a dict with ok, message, status_code and response_time_ms.
+    """
+    started = time.perf_counter()
+    try:
+        response = _session.get(url, timeout=timeout)
+    except requests.RequestException as e:
+        logging.warning(f"Probe failed for {url}: {e}")
+        return {
+            'ok': False,
+            'message': f"Request failed: {e.__class__.__name__}",
+            'status_code': None,
+            'response_time_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+    response_time_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    if response.status_code != 200:
+        return {
+            'ok': False,
+            'message': f"HTTP {response.status_code}",
+            'status_code': response.status_code,
+            'response_time_ms': response_time_ms
+        }
+
+    missing, has_token = scan_form(response.text)
+    problems = []
+    if missing:
+        problems.append(f"Missing elements: {', '.join(missing)}")
+    if not has_token:
+        problems.append("Missing CSRF token")
+
+    return {
+        'ok': not problems,
+        'message': '; '.join(problems) if problems else "All form elements found",
+        'status_code': response.status_code,
+        'response_time_ms': response_time_ms
+    }
+
+
+def probe_sites(urls, timeout=PROBE_TIMEOUT):
+    """Probe several sites concurrently, returning {url: result}"""
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(MAX_PROBE_WORKERS, len(urls))) as pool:
+        results = pool.map(lambda url: probe_site(url, timeout), urls)
+        return dict(zip(urls, results))
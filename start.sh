@@ -14,7 +14,9 @@ export FLASK_ENV=production
 export PYTHONPATH=/opt/antam-bot
 
 # Create necessary directories
-mkdir -p logs screenshots
+mkdir -p logs screenshots snapshots
 
 # Start the application with gunicorn
-exec gunicorn --bind 0.0.0.0:5005 --workers 1 --timeout 120 --keep-alive 2 --max-requests 1000 --max-requests-jitter 50 --preload --access-logfile logs/access.log --error-logfile logs/error.log bot_dashboard:app
\ No newline at end of file
+# One worker, no --preload and no --max-requests: the worker that imports bot_dashboard owns the
+# scheduler, watchdog and every bot run, so /debug/profile sees them and recycling can't kill runs
+exec gunicorn --bind 0.0.0.0:5005 --workers 1 --threads 4 --timeout 120 --keep-alive 2 --access-logfile logs/access.log --error-logfile logs/error.log bot_dashboard:app
\ No newline at end of file
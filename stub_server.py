@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for an ANTAM queue site
+Serves contoh.html with a fresh CSRF token and captcha, accepts the POST and
+answers with a success or error page. Latency and failures can be injected.
+
+Usage:
+    python stub_server.py --port 8000 --failure-rate 0.3 --latency-ms 200
+"""
+
+import re
+import time
+import random
+import string
+import logging
+import argparse
+import threading
+from pathlib import Path
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FORM_TEMPLATE = Path(__file__).resolve().parent / "contoh.html"
+MAX_SESSIONS = 10000  # outstanding token/captcha pairs kept in memory
+
+SUCCESS_PAGE = """<!DOCTYPE html>
+<html><head><title>Pendaftaran Berhasil</title></head>
+<body>
+<h1>Pendaftaran Berhasil</h1>
+<p>Terima kasih {name}. Nomor antrian Anda: <strong>A{number:03d}</strong></p>
+</body></html>
+"""
+
+# Must not contain any of ANTAMQueueBot's success indicators
+ERROR_PAGE = """<!DOCTYPE html>
+<html><head><title>Gagal</title></head>
+<body>
+<h1>Gagal</h1>
+<p>{reason}</p>
+</body></html>
+"""
+
+# External CSS/JS would stall Chrome on an offline box
+EXTERNAL_RESOURCE = re.compile(
+    r'<script[^>]+src="https?://[^"]*"[^>]*>\s*</script>|<link[^>]+href="https?://[^"]*"[^>]*>',
+    re.IGNORECASE
+)
+TOKEN_INPUT = re.compile(r'(name="_token" value=")[^"]*(")')
+CAPTCHA_BOX = re.compile(r'(<div id="captcha-box"[^>]*>)\s*[^<]*?\s*(</div>)', re.DOTALL)
+FORM_ACTION = re.compile(r'<form action="[^"]*"')
+
+
+class StubState:
+    """Options and counters shared by all request handlers"""
+
+    def __init__(self, failure_rate=0.0, latency_ms=0, jitter_ms=0, mode='validate', seed=None):
+        self.failure_rate = failure_rate
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.mode = mode  # validate, success, error
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.sessions = {}  # _token -> captcha
+        self.counters = {'form_views': 0, 'posts': 0, 'successes': 0, 'errors': 0}
+        self.template = EXTERNAL_RESOURCE.sub('', FORM_TEMPLATE.read_text(encoding='utf-8'))
+        self.template = FORM_ACTION.sub('<form action="/"', self.template)
+
+    def delay(self):
+        latency = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+        if latency > 0:
+            time.sleep(latency / 1000)
+
+    def new_form(self):
+        with self.lock:
+            token = ''.join(self.random.choices(string.ascii_letters + string.digits, k=40))
+            captcha = ''.join(self.random.choices(string.ascii_letters + string.digits, k=8))
+            self.sessions[token] = captcha
+            if len(self.sessions) > MAX_SESSIONS:
+                # Forget the oldest form (dicts keep insertion order)
+                self.sessions.pop(next(iter(self.sessions)))
+            self.counters['form_views'] += 1
+        page = TOKEN_INPUT.sub(rf'\g<1>{token}\g<2>', self.template)
+        return CAPTCHA_BOX.sub(rf'\g<1>{captcha}\g<2>', page)
+
+    def submit(self, form):
+        """Return (ok, response_page) for a posted form"""
+        with self.lock:
+            self.counters['posts'] += 1
+            captcha = self.sessions.pop(form.get('_token', ''), None)
+            inject_failure = self.random.random() < self.failure_rate
+
+        if self.mode == 'success':
+            ok, reason = True, ''
+        elif self.mode == 'error':
+            ok, reason = False, 'Layanan penuh, silakan coba lagi.'
+        elif captcha is None:
+            ok, reason = False, 'Sesi kedaluwarsa (token tidak valid).'
+        elif form.get('captcha_input', '') != captcha:
+            ok, reason = False, 'Kode verifikasi tidak sesuai.'
+        elif not all(form.get(field) for field in ('name', 'ktp', 'phone_number', 'check', 'check_2')):
+            ok, reason = False, 'Data belum lengkap.'
+        elif inject_failure:
+            ok, reason = False, 'Kuota penuh (injected failure).'
+        else:
+            ok, reason = True, ''
+
+        with self.lock:
+            self.counters['successes' if ok else 'errors'] += 1
+            number = self.counters['successes']
+        if ok:
+            return True, SUCCESS_PAGE.format(name=form.get('name', ''), number=number)
+        return False, ERROR_PAGE.format(reason=reason)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    state = None  # set by make_server
+
+    def send_html(self, status, body):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.state.delay()
+        if self.path.split('?')[0] in ('/', '/contoh.html'):
+            self.send_html(200, self.state.new_form())
+        elif self.path == '/stats':
+            with self.state.lock:
+                body = repr(self.state.counters)
+            self.send_html(200, body)
+        else:
+            self.send_html(404, ERROR_PAGE.format(reason='Halaman tidak ditemukan.'))
+
+    def do_POST(self):
+        self.state.delay()
+        length = int(self.headers.get('Content-Length', 0))
+        raw = self.rfile.read(length).decode('utf-8', errors='replace')
+        form = {key: values[0] for key, values in parse_qs(raw).items()}
+        ok, page = self.state.submit(form)
+        # Real sites answer validation errors with 200 as well
+        self.send_html(200, page)
+
+    def log_message(self, format, *args):
+        logging.debug(f"stub {self.address_string()} {format % args}")
+
+
+def make_server(host='127.0.0.1', port=0, **options):
+    """Create (but don't start) a stub server; port 0 picks a free port"""
+    state = StubState(**options)
+    handler = type('BoundStubHandler', (StubHandler,), {'state': state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.state = state
+    return server
+
+
+def start_in_thread(host='127.0.0.1', port=0, **options):
+    """Start a stub server in a daemon thread, returning (server, base_url)"""
+    server = make_server(host, port, **options)
+    thread = threading.Thread(target=server.serve_forever, name='stub-server', daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in ANTAM queue site")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--mode', choices=['validate', 'success', 'error'], default='validate',
+                        help="validate checks token/captcha/fields; success/error force the outcome")
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                        help="fraction of valid submissions answered with an error page")
+    parser.add_argument('--latency-ms', type=float, default=0, help="added to every response")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="random extra latency up to this")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = make_server(args.host, args.port, failure_rate=args.failure_rate, latency_ms=args.latency_ms,
+                         jitter_ms=args.jitter_ms, mode=args.mode, seed=args.seed)
+    logging.info(f"Stub ANTAM site on http://{args.host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()